@@ -1,7 +1,7 @@
 """Base adapter interface for multi-language AST parsing using ast-grep."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Tuple, Set
+from typing import Dict, List, Any, Optional, Tuple, Set
 import sys
 import os
 
@@ -36,7 +36,7 @@ class LanguageAdapter(ABC):
         self.module_definitions: Dict[str, Dict[str, str]] = {}
         self.pending_imports: List[Dict[str, Any]] = []
         self.module_to_file: Dict[str, str] = {}
-        self.established_relations: Set[str] = set()
+        self.established_relations: Set[Tuple[Optional[str], ...]] = set()
     
     @abstractmethod
     def parse_file(self, file_path: str, build_index: bool = False) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
@@ -86,16 +86,15 @@ class LanguageAdapter(ABC):
         Creates a unique key based on source, type, target, and relevant properties.
         """
         # Create unique relation key
-        relation_key = f"{relation.source_id}|{relation.relation_type}|{relation.target_id}"
+        relation_key: Tuple[Optional[str], ...] = (relation.source_id, relation.relation_type, relation.target_id)
         
         # For certain relation types, include properties in the key
-        if relation.relation_type == "IMPORTS_FROM":
-            # File-to-module import: one relation per file-module pair
-            relation_key = f"{relation.source_id}|{relation.relation_type}|{relation.target_id}"
-        elif relation.relation_type == "IMPORTS_DEFINITION":
+        # IMPORTS_FROM (file-to-module import) is covered by the default key:
+        # one relation per file-module pair
+        if relation.relation_type == "IMPORTS_DEFINITION":
             # Symbol import: include symbol name in key
             symbol = relation.properties.get("symbol", "")
-            relation_key = f"{relation.source_id}|{relation.relation_type}|{relation.target_id}|{symbol}"
+            relation_key = (relation.source_id, relation.relation_type, relation.target_id, symbol)
         
         # Only add if not already present
         if relation_key not in self.established_relations:
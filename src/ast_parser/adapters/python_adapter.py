@@ -1,7 +1,6 @@
 """Python language adapter using ast-grep for AST parsing."""
 
 import os
-import json
 from typing import Dict, List, Optional, Tuple, Any, Union, Set
 
 from ast_grep_py import SgRoot, SgNode
@@ -397,9 +396,9 @@ class PythonAstGrepAdapter(LanguageAdapter):
                     arg_info = {"name": name_field.text(), "has_default": True}
                     args.append(arg_info)
         
-        # Store args as JSON string (matching ASTParser behavior)
+        # Store the raw args list (matching ASTParser behavior)
         if args:
-            self.nodes[node_id].properties["args"] = json.dumps(args)
+            self.nodes[node_id].properties["args"] = args
     
     def _parse_global_variables(self, root: SgNode, file_node_id: str) -> None:
         """Extract global-level variable assignments."""
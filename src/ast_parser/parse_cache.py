@@ -0,0 +1,247 @@
+"""
+Persistent per-file parse cache.
+
+Stores the result of parsing each source file together with the file's
+modification time, size and SHA-256 digest, so repeated indexing runs only
+re-parse the files whose content actually changed.
+"""
+
+import os
+import atexit
+import hashlib
+import pickle
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the shape of cached parse results changes, for either
+# ASTParser or TypeScriptParser; both store their results in the same file.
+CACHE_VERSION = 8
+
+FileStamp = Tuple[int, int]
+
+
+class ParseCache:
+    """
+    Pickle-backed mapping of file path -> (mtime_ns, size, sha256, parse result).
+
+    An entry is valid when the file's (mtime_ns, size) stamp still matches.
+    When only the stamp changed (fresh clone, checkout, touch) the content
+    digest is compared instead, so unchanged content is still a hit. Files
+    without an entry are never read here; their digest comes from the bytes
+    the caller parsed, passed to put().
+    The cache is loaded once on construction and written back with save();
+    directory parses prune() the entries of files that have gone away.
+    A missing, unreadable or outdated cache file simply starts empty.
+    Results are kept pickled, so every hit returns a fresh copy that callers
+    may mutate freely.
+    """
+
+    def __init__(self, cache_path: str):
+        """
+        Initialize the cache and load existing entries from disk.
+
+        Args:
+            cache_path: Path of the pickle file backing the cache
+        """
+        self.cache_path = cache_path
+        self.entries: Dict[str, Tuple[int, int, Optional[str], bytes]] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Load entries from the cache file, ignoring unusable files."""
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "rb") as cache_file:
+                payload = pickle.load(cache_file)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache {self.cache_path}: {e}")
+            return
+
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+            logger.info(f"Parse cache {self.cache_path} is outdated, rebuilding")
+            return
+        self.entries = payload["entries"]
+
+    @staticmethod
+    def stamp(file_path: str) -> Optional[FileStamp]:
+        """
+        Get the (mtime_ns, size) stamp used to validate an entry.
+
+        Args:
+            file_path: Path of the source file
+
+        Returns:
+            The stamp, or None if the file cannot be stat'ed
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def digest(file_path: str) -> Optional[str]:
+        """
+        Get the SHA-256 hex digest of the file content.
+
+        Args:
+            file_path: Path of the source file
+
+        Returns:
+            The digest, or None if the file cannot be read
+        """
+        try:
+            with open(file_path, "rb") as source_file:
+                return content_digest(source_file.read())
+        except OSError:
+            return None
+
+    def get(self, file_path: str, stamp: Optional[FileStamp]) -> Optional[Any]:
+        """
+        Return the cached result for file_path if its stamp or content still matches.
+
+        Args:
+            file_path: Path of the source file
+            stamp: Current stamp of the file (see stamp())
+
+        Returns:
+            The cached parse result, or None on a miss
+        """
+        if stamp is None:
+            return None
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return None
+        if (entry[0], entry[1]) == stamp:
+            return pickle.loads(entry[3])
+
+        # Only the stamp changed: the content decides
+        digest = self.digest(file_path)
+        if digest is None or entry[2] != digest:
+            return None
+        with self._lock:
+            self.entries[file_path] = (stamp[0], stamp[1], digest, entry[3])
+            self.dirty = True
+        return pickle.loads(entry[3])
+
+    def put(self, file_path: str, stamp: Optional[FileStamp], result: Any, digest: Optional[str] = None) -> None:
+        """
+        Store the parse result for file_path.
+
+        Args:
+            file_path: Path of the source file
+            stamp: Stamp taken before the file was parsed
+            result: Parse result to cache
+            digest: content_digest() of the bytes the result was parsed
+                from; without it the entry is only valid while the stamp
+                matches
+        """
+        if stamp is None:
+            return
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.entries[file_path] = (stamp[0], stamp[1], digest, blob)
+            self.dirty = True
+
+    def prune(self, directory_path: str, seen: Iterable[str], suffixes: Tuple[str, ...]) -> int:
+        """
+        Drop the entries of deleted or renamed files under directory_path.
+
+        Only entries whose path ends with one of suffixes are considered, so
+        a parser never prunes files that another parser owns.
+
+        Args:
+            directory_path: Directory that was just walked, as passed to the walk
+            seen: Paths the walk found
+            suffixes: File suffixes the walking parser handles
+
+        Returns:
+            Number of entries removed
+        """
+        prefix = os.path.join(directory_path, "")
+        seen = set(seen)
+        with self._lock:
+            stale = [
+                file_path
+                for file_path in self.entries
+                if file_path.startswith(prefix) and file_path.endswith(suffixes) and file_path not in seen
+            ]
+            for file_path in stale:
+                del self.entries[file_path]
+            if stale:
+                self.dirty = True
+        return len(stale)
+
+    def save(self) -> None:
+        """Atomically write the cache back to disk if it changed."""
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp_path = f"{self.cache_path}.tmp"
+            try:
+                cache_dir = os.path.dirname(self.cache_path)
+                if cache_dir:
+                    os.makedirs(cache_dir, exist_ok=True)
+                with open(tmp_path, "wb") as cache_file:
+                    pickle.dump(
+                        {"version": CACHE_VERSION, "entries": self.entries},
+                        cache_file,
+                        protocol=pickle.HIGHEST_PROTOCOL,
+                    )
+                os.replace(tmp_path, self.cache_path)
+                self.dirty = False
+            except Exception as e:
+                logger.warning(f"Could not write parse cache {self.cache_path}: {e}")
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Get the SHA-256 hex digest stored with cache entries for data.
+
+    Args:
+        data: Content of a source file
+
+    Returns:
+        The digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+# One cache per cache file and process, shared by all parser instances
+_shared_caches: Dict[str, ParseCache] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_parse_cache(cache_path: str) -> ParseCache:
+    """
+    Get the process-wide ParseCache for cache_path, loading it on first use.
+
+    Shared caches are saved automatically when the interpreter exits
+    normally; long-running callers should call save_shared_caches() once
+    they finish parsing, since a killed process never reaches that hook.
+
+    Args:
+        cache_path: Path of the pickle file backing the cache
+
+    Returns:
+        The shared ParseCache instance
+    """
+    key = os.path.abspath(cache_path)
+    with _shared_caches_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = _shared_caches[key] = ParseCache(cache_path)
+        return cache
+
+
+@atexit.register
+def save_shared_caches() -> None:
+    """Flush every shared cache that still has unsaved entries."""
+    for cache in list(_shared_caches.values()):
+        cache.save()
@@ -1,13 +1,34 @@
 import ast
+import inspect
 import os
-from typing import Dict, List, Optional, Tuple, Any, Union, Set
-import json
+import re
+import sys
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Any, Union, Set, Iterator
+
+from src.ast_parser.parse_cache import content_digest
+
+logger = logging.getLogger(__name__)
 
 
 class CodeNode:
     """代表程式碼中的節點（類別、函數、變數等）"""
     # Represents a node in the code (class, function, variable, etc.)
 
+    __slots__ = (
+        "node_id",
+        "node_type",
+        "name",
+        "file_path",
+        "line_no",
+        "end_line_no",
+        "properties",
+        "code_snippet",
+    )
+
     def __init__(
         self,
         node_id: str,
@@ -17,17 +38,35 @@ class CodeNode:
         line_no: int,
         end_line_no: Optional[int] = None,
     properties: Optional[Dict[str, Any]] = None,
-    ):
+    ) -> None:
         self.node_id = node_id
-        self.node_type = node_type
+        # Shared strings are interned so every parser, including the
+        # TypeScript parser and ast-grep adapters, stores one copy of each
+        self.node_type = sys.intern(node_type)
         self.name = name
-        self.file_path = file_path
+        self.file_path = sys.intern(file_path)
         self.line_no = line_no
         self.end_line_no = end_line_no
-        self.properties = properties or {}
-        self.code_snippet = ""
+        # properties and code_snippet are left unset until they are needed;
+        # see __getattr__
+        if properties:
+            self.properties = properties
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for unset slots: an unassigned code_snippet reads as "",
+        # properties are allocated on first access so writes through them stick
+        if name == "properties":
+            properties = self.properties = {}
+            return properties
+        if name == "code_snippet":
+            return ""
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
-    def __str__(self):
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # Pickle only the slots that are set, so lazy ones stay unallocated
+        return None, _set_slots(self)
+
+    def __str__(self) -> str:
         return f"{self.node_type}:{self.name} ({self.file_path}:{self.line_no})"
 
 
@@ -35,110 +74,452 @@ class CodeRelation:
     """代表程式碼中的關係（調用、繼承等）"""
     # Represents a relationship in the code (call, inheritance, etc.)
 
+    __slots__ = ("source_id", "target_id", "relation_type", "properties")
+
     def __init__(
     self,
     source_id: Optional[str],
     target_id: Optional[str],
     relation_type: str,
     properties: Optional[Dict[str, Any]] = None,
-    ):
+    ) -> None:
         self.source_id = source_id
         self.target_id = target_id
-        self.relation_type = relation_type
-        self.properties = properties or {}
+        self.relation_type = sys.intern(relation_type)
+        # Most relations carry no properties; the dict is allocated on first
+        # access instead, see __getattr__
+        if properties:
+            self.properties = properties
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached while properties is unset
+        if name == "properties":
+            properties = self.properties = {}
+            return properties
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        return None, _set_slots(self)
 
-    def __str__(self):
+    def __str__(self) -> str:
         return f"{self.source_id} -{self.relation_type}-> {self.target_id}"
 
 
+def _set_slots(obj: Any) -> Dict[str, Any]:
+    """Return the slots of obj that hold a value, without triggering lazy defaults."""
+    state = {}
+    for name in obj.__slots__:
+        try:
+            state[name] = object.__getattribute__(obj, name)
+        except AttributeError:
+            pass
+    return state
+
+
+def _properties_or_none(obj: Union[CodeNode, CodeRelation]) -> Optional[Dict[str, Any]]:
+    """Return obj's properties if it has any, without allocating an empty dict."""
+    try:
+        return object.__getattribute__(obj, "properties") or None
+    except AttributeError:
+        return None
+
+
+# Relations in column form: (source_ids, target_ids, relation_types, properties)
+RelationColumns = Tuple[
+    List[Optional[str]],
+    List[Optional[str]],
+    List[str],
+    List[Optional[Dict[str, Any]]],
+]
+
+
+class ParseResult(NamedTuple):
+    """Output of parsing a single file, as shipped from pool workers and stored in the parse cache."""
+
+    nodes: Dict[str, CodeNode]
+    relation_columns: RelationColumns
+    module_definitions: Dict[str, Dict[str, str]]
+    pending_by_source: Dict[str, List[Dict[str, Any]]]
+    module_to_file: Dict[str, str]
+
+
+# AST classes used on the per-node call-search path, bound once at module
+# level to skip the attribute lookup on the ast module for every node
+_Call = ast.Call
+_Name = ast.Name
+_Attribute = ast.Attribute
+_iter_child_nodes = ast.iter_child_nodes
+# Used by _fast_docstring, which runs once per function and method
+_Expr = ast.Expr
+_Constant = ast.Constant
+_cleandoc = inspect.cleandoc
+
+
+def _split_import(import_path: str) -> Tuple[str, str, str]:
+    """Split a dotted import path into (root module, last part, full path) once."""
+    parts = import_path.split(".")
+    return parts[0], parts[-1], import_path
+
+
+def _fast_docstring(node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> Optional[str]:
+    """
+    Same result as ast.get_docstring(node), with a cheap early exit.
+
+    Most functions have no docstring, so the first statement is checked by
+    class identity before any string work. Found docstrings are still
+    cleaned with inspect.cleandoc, as get_docstring does.
+    """
+    body = node.body
+    if not body:
+        return None
+    first = body[0]
+    if first.__class__ is not _Expr:
+        return None
+    value = first.value
+    if value.__class__ is not _Constant or value.value.__class__ is not str:
+        return None
+    return _cleandoc(value.value)
+
+
+# Name-valued fields of pending import entries, interned on merge
+_PENDING_NAME_FIELDS = (
+    "type",
+    "imported_module",
+    "imported_name",
+    "imported_class",
+    "method_name",
+    "original_name",
+    "original_obj_name",
+    "alias",
+)
+
+
+def _original_name_properties(import_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Properties for a resolved EXTENDS/CALLS relation; None when the entry has no original name."""
+    original_name = import_info.get("original_name")
+    if original_name is None:
+        return None
+    return {"original_name": original_name}
+
+
+def _index_class_methods(
+    class_methods: Dict[Tuple[str, str], str], nodes: Dict[str, CodeNode], relations: List[CodeRelation]
+) -> None:
+    """Add the (class node id, method name) -> method node id pairs of the DEFINES relations."""
+    for relation in relations:
+        if relation.relation_type != "DEFINES" or relation.target_id is None:
+            continue
+        target_node = nodes.get(relation.target_id)
+        if target_node and target_node.node_type == "Method":
+            # Keep the first definition, as the former linear scan did
+            class_methods.setdefault((relation.source_id, target_node.name), relation.target_id)
+
+
+# Stand-in for modules missing from the definitions index
+_NO_DEFINITIONS: Dict[str, str] = {}
+
+# AST node types that have no children which could contain a call
+_LEAF_TYPES = frozenset(
+    [ast.Name, ast.Constant]
+    + ast.expr_context.__subclasses__()
+    + ast.operator.__subclasses__()
+    + ast.boolop.__subclasses__()
+    + ast.cmpop.__subclasses__()
+    + ast.unaryop.__subclasses__()
+)
+
+# Source text that can yield anything beyond the File node: a class or
+# function definition, an import or an assignment. Deliberately loose.
+_INTERESTING_SOURCE = re.compile(rb"\b(?:class|def|import)\b|=")
+
+
 class ASTParser:
     """使用 Python AST 模組解析程式碼的解析器"""
     # Parser that uses the Python AST module to parse code
 
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None) -> None:
         self.nodes: Dict[str, CodeNode] = {}
         self.relations: List[CodeRelation] = []
         self.current_file: str = ""
+        self.current_file_node_id: str = ""
+        # Node id prefixes for the current file, keyed by node type
+        self._id_prefixes: Dict[str, str] = {}
+        # Pending import entries already queued for the current file
+        self._pending_seen: Set[Tuple[Any, ...]] = set()
+        # Handlers for class body statements, looked up by exact node type
+        self._class_body_dispatch: Dict[type, Callable[[Any], Any]] = {
+            ast.FunctionDef: self._parse_method,
+            ast.Assign: self._parse_class_attribute,
+        }
         self.current_function: Optional[str] = None
         self.current_class: Optional[str] = None
-        self.imports: Dict[str, str] = {}
+        # Local name -> (root module, last dotted part, full import path)
+        self.imports: Dict[str, Tuple[str, str, str]] = {}
         # 用於追蹤模組中的定義
         # Used to track definitions within modules
         self.module_definitions: Dict[str, Dict[str, str]] = {}
         # 用於追蹤待處理的導入依賴關係
-        # Used to track pending import dependencies
-        self.pending_imports: List[Dict[str, Any]] = []
+        # Used to track pending import dependencies, grouped by source node id
+        # in first-seen order (see the pending_imports property)
+        self.pending_by_source: Dict[str, List[Dict[str, Any]]] = {}
         # 用於追蹤模組名稱與檔案節點的對應關係
         # Used to track the mapping between module names and file nodes
         self.module_to_file: Dict[str, str] = {}
         # 用於追蹤已建立的關係，避免重複
         # Used to track established relationships to avoid duplication
-        self.established_relations: Set[str] = set()
+        self.established_relations: Set[Tuple[Optional[str], ...]] = set()
+        # Optional on-disk parse cache used by parse_directory; falls back to
+        # the PARSE_CACHE_PATH environment variable, disabled when empty.
+        self.cache_path: Optional[str] = cache_path or os.environ.get("PARSE_CACHE_PATH") or None
+
+    @property
+    def pending_imports(self) -> List[Dict[str, Any]]:
+        """Flat list of pending import entries, grouped by source in first-seen order."""
+        return [import_info for imports in self.pending_by_source.values() for import_info in imports]
+
+    @pending_imports.setter
+    def pending_imports(self, pending_imports: List[Dict[str, Any]]) -> None:
+        # Callers that merge several parsers' entries assign a flat list
+        self.pending_by_source = {}
+        for import_info in pending_imports:
+            self.pending_by_source.setdefault(import_info["source_id"], []).append(import_info)
 
     def parse_directory(self, directory_path: str) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
         """解析目錄中的所有Python檔案"""
         # Parses all Python files in the directory
+        nodes: Dict[str, CodeNode] = {}
+        relations: List[CodeRelation] = []
+        for batch_nodes, batch_relations in self.iter_parse_directory(directory_path):
+            nodes.update(batch_nodes)
+            relations.extend(batch_relations)
+
+        self.nodes = nodes
+        self.relations = relations
+        return self.nodes, self.relations
+
+    def iter_parse_directory(self, directory_path: str) -> Iterator[Tuple[Dict[str, CodeNode], List[CodeRelation]]]:
+        """
+        Parse all Python files in the directory, yielding results as they become available.
+
+        Yields one (nodes, relations) pair per file in walk order, followed by a
+        final pair holding the File nodes that import resolution gave their
+        module_name property, which consumers storing batches as they arrive
+        should upsert, and the cross-file relations it created.
+        Between files only the index data resolution needs is kept, so
+        afterwards self.nodes holds just the File nodes and self.relations
+        just the resolved relations.
+        """
         self.nodes = {}
         self.relations = []
         self.module_definitions = {}
-        self.pending_imports = []
+        self.pending_by_source = {}
         self.module_to_file = {}
         self.established_relations = set()
 
+        file_paths = list(_iter_py_files(directory_path))
+
+        # Unchanged files are served from the parse cache when one is configured
+        cache = None
+        stamps: Dict[str, Any] = {}
+        cached: Dict[str, ParseResult] = {}
+        if self.cache_path:
+            from src.ast_parser.parse_cache import get_parse_cache
+
+            cache = get_parse_cache(self.cache_path)
+            for file_path in file_paths:
+                stamp = stamps[file_path] = cache.stamp(file_path)
+                hit = cache.get(file_path, stamp)
+                if hit is not None:
+                    cached[file_path] = hit
+        misses = [file_path for file_path in file_paths if file_path not in cached]
+
         # 第一遍：創建所有節點並建立模組定義索引
-        # First pass: create all nodes and build module definition index
-        for root, _, files in os.walk(directory_path):
-            for file_name in files:
-                if file_name.endswith(".py"):
-                    file_path = os.path.join(root, file_name)
-                    self.parse_file(file_path, build_index=True)
+        # First pass: create all nodes and build module definition index.
+        # Files are independent, so they are parsed by the processing pool
+        # and merged back in their original order.
+        from src.parallel.pool_manager import get_processing_pool
+
+        # With a cache, workers also return the digest of the bytes they parsed
+        worker = _parse_file_worker if cache is None else _parse_cached_file_worker
+        # (class id, method name) -> method id, collected file by file so
+        # CALLS_METHOD entries resolve without keeping every relation
+        class_methods: Dict[Tuple[str, str], str] = {}
+        with get_processing_pool(item_count=len(misses)) as pool:
+            if pool.executor_type == "sequential":
+                # Parsing happens on this thread, so a reader thread keeps
+                # the next few files' bytes ready to hide disk latency
+                parsed = map(worker, misses, _prefetch_sources(misses))
+            else:
+                parsed = iter(pool.map(worker, misses, chunksize=16))
+            for file_path in file_paths:
+                result = cached.get(file_path)
+                if result is None:
+                    if cache is None:
+                        result = next(parsed)
+                    else:
+                        result, digest = next(parsed)
+                        cache.put(file_path, stamps[file_path], result, digest)
+                nodes, relations = self._merge_file_index(result)
+                _index_class_methods(class_methods, nodes, relations)
+                # Only the File node is kept, for resolution to name its module
+                for file_node_id in result.module_to_file.values():
+                    file_node = nodes.get(file_node_id)
+                    if file_node is not None:
+                        self.nodes[file_node_id] = file_node
+                yield nodes, relations
+
+        # Persist newly parsed files before the import resolution pass, dropping
+        # the entries of files that no longer exist
+        if cache is not None:
+            cache.prune(directory_path, file_paths, (".py",))
+            cache.save()
 
         # 第二遍：處理所有待處理的導入關係
         # Second pass: process all pending import relationships
-        self._process_pending_imports()
+        self._process_pending_imports(class_methods)
 
-        return self.nodes, self.relations
+        yield dict(self.nodes), self.relations
         
-    def parse_file(self, file_path: str, build_index: bool = False) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
+    def parse_file(
+        self, file_path: str, build_index: bool = False, source: Optional[bytes] = None
+    ) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
         """解析單個Python檔案"""
-        # Parses a single Python file
+        # Parses a single Python file; source, when given, is the file's
+        # already-read content and saves reading it again
+        if build_index and self.cache_path:
+            return self._parse_file_cached(file_path, source)
+
         # print(f"解析檔案: {file_path}")
         # Disabled Chinese log above.
-        print(f"Parsing file: {file_path}")
-        self.current_file = file_path
-        self.imports = {}
+        logger.debug("Parsing file: %s", file_path)
+        self._begin_file(file_path)
 
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                file_content = file.read()
-                tree = ast.parse(file_content)
-                file_node_id = self._create_file_node(file_path)
-                
-                # 生成模組名稱，用於索引
-                # Generate module name for indexing
-                module_name = os.path.splitext(os.path.basename(file_path))[0]
-                if build_index:
-                    if module_name not in self.module_definitions:
-                        self.module_definitions[module_name] = {}
-                    # 關聯模組名稱與檔案節點
-                    # Associate module name with file node
-                    self.module_to_file[module_name] = file_node_id
-                
+            # Raw bytes go straight to the parser, which handles the BOM and
+            # coding declarations itself instead of us decoding first
+            if source is None:
+                with open(file_path, "rb") as file:
+                    source = file.read()
+            # Files that cannot define or import anything only get their
+            # File node, so building their AST is skipped entirely
+            if _INTERESTING_SOURCE.search(source):
+                tree = ast.parse(source, filename=file_path, type_comments=False)
+            else:
+                tree = None
+            file_node_id = self._create_file_node(self.current_file)
+            
+            # 生成模組名稱，用於索引
+            # Generate module name for indexing
+            module_name = os.path.splitext(self.nodes[file_node_id].name)[0]
+            if build_index:
+                if module_name not in self.module_definitions:
+                    self.module_definitions[module_name] = {}
+                # 關聯模組名稱與檔案節點
+                # Associate module name with file node
+                self.module_to_file[module_name] = file_node_id
+            
+            if tree is not None:
                 self._parse_ast(tree, build_index, module_name)
 
             return self.nodes, self.relations
-        except Exception as e:
+        except Exception:
             # print(f"解析檔案 {file_path} 時發生錯誤: {e}")
             # Disabled Chinese error log above.
-            print(f"Error parsing file {file_path}: {e}")
-            # Error parsing file {file_path}: {e}
+            logger.exception("Error parsing file %s", file_path)
             return {}, []
 
+    def _begin_file(self, file_path: str) -> None:
+        """Reset all per-file parse state before parsing file_path.
+
+        The class/function context is reset as well, so a file that failed
+        halfway cannot leak its context into the next file parsed by this
+        instance.
+        """
+        self.current_file = sys.intern(file_path)
+        self.current_file_node_id = "file:" + self.current_file
+        self.current_class = None
+        self.current_function = None
+        self.imports = {}
+        self._id_prefixes = {}
+        self._pending_seen = set()
+
+    def _parse_file_cached(
+        self, file_path: str, source: Optional[bytes] = None
+    ) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
+        """Parse a file with build_index=True, reusing the shared parse cache."""
+        from src.ast_parser.parse_cache import get_parse_cache
+
+        cache = get_parse_cache(self.cache_path)
+        stamp = cache.stamp(file_path)
+        result = cache.get(file_path, stamp)
+        if result is None:
+            # Parse in isolation so only this file's output is cached
+            result, digest = _parse_cached_file_worker(file_path, source)
+            cache.put(file_path, stamp, result, digest)
+        self._merge_file_result(result)
+        return self.nodes, self.relations
+
+    def _export_file_result(self) -> ParseResult:
+        """Return the state collected by this parser as a picklable ParseResult."""
+        # Relations travel as parallel columns, which pickle far more compactly
+        # than one object per relation and are rebuilt on merge.
+        relations = self.relations
+        relation_columns = (
+            [relation.source_id for relation in relations],
+            [relation.target_id for relation in relations],
+            [relation.relation_type for relation in relations],
+            [_properties_or_none(relation) for relation in relations],
+        )
+        return ParseResult(
+            self.nodes,
+            relation_columns,
+            self.module_definitions,
+            self.pending_by_source,
+            self.module_to_file,
+        )
+
+    def _merge_file_result(self, result: ParseResult) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
+        """Merge the output of a single-file parse into this parser and return its nodes and relations."""
+        nodes, relations = self._merge_file_index(result)
+        self.nodes.update(nodes)
+        self.relations.extend(relations)
+        return nodes, relations
+
+    def _merge_file_index(self, result: ParseResult) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
+        """Merge only the resolution index of a single-file parse and return its nodes and relations."""
+        nodes, relation_columns, module_definitions, pending_by_source, module_to_file = result
+        # Results unpickled from workers or the cache carry their own copies of
+        # repeated strings; intern them so all files share one object each.
+        intern = sys.intern
+        for node in nodes.values():
+            node.node_type = intern(node.node_type)
+            node.name = intern(node.name)
+            node.file_path = intern(node.file_path)
+        source_ids, target_ids, relation_types, properties = relation_columns
+        relations = list(
+            map(CodeRelation, source_ids, target_ids, map(intern, relation_types), properties)
+        )
+        for module_name, definitions in module_definitions.items():
+            self.module_definitions.setdefault(intern(module_name), {}).update(
+                (intern(name), node_id) for name, node_id in definitions.items()
+            )
+        for source_id, imports in pending_by_source.items():
+            # The module and symbol names are the keys probed against
+            # module_definitions during resolution
+            for import_info in imports:
+                for field in _PENDING_NAME_FIELDS:
+                    value = import_info.get(field)
+                    if value is not None:
+                        import_info[field] = intern(value)
+            self.pending_by_source.setdefault(source_id, []).extend(imports)
+        self.module_to_file.update(module_to_file)
+        return nodes, relations
+
     def _create_file_node(self, file_path: str) -> str:
         """創建檔案節點"""
         # Creates a file node
         file_name = os.path.basename(file_path)
-        node_id = f"file:{file_path}"
+        node_id = self.current_file_node_id if file_path is self.current_file else f"file:{file_path}"
         self.nodes[node_id] = CodeNode(
             node_id=node_id,
             node_type="File",
@@ -148,29 +529,41 @@ class ASTParser:
         )
         return node_id
 
+    def _add_node(
+        self,
+        node_id: str,
+        node_type: str,
+        name: str,
+        node: ast.AST,
+        properties: Optional[Dict[str, Any]] = None,
+    ) -> CodeNode:
+        """Create a node for an AST definition in the current file and register it."""
+        code_node = self.nodes[node_id] = CodeNode(
+            node_id,
+            node_type,
+            name,
+            self.current_file,
+            node.lineno,
+            getattr(node, "end_lineno", None),
+            properties,
+        )
+        return code_node
+
     def _get_node_id(self, node_type: str, name: str, file_path: str, line_no: int) -> str:
         """生成節點唯一標識符"""
         # Generates a unique identifier for the node
+        if file_path is self.current_file:
+            # Reuse the "<type>:<file>:" prefix built once per file and node type
+            prefix = self._id_prefixes.get(node_type)
+            if prefix is None:
+                prefix = self._id_prefixes[node_type] = f"{node_type}:{file_path}:"
+            return f"{prefix}{name}:{line_no}"
         return f"{node_type}:{file_path}:{name}:{line_no}"
 
     def _parse_ast(self, tree: ast.AST, build_index: bool = False, module_name: str = "") -> None:
         """遞迴解析AST樹狀結構"""
         # Recursively parses the AST tree structure
-        for node in ast.iter_child_nodes(tree):
-            if isinstance(node, ast.ClassDef):
-                node_id = self._parse_class(node)
-                if build_index and module_name:
-                    self.module_definitions[module_name][node.name] = node_id
-            elif isinstance(node, ast.FunctionDef):
-                node_id = self._parse_function(node)
-                if build_index and module_name:
-                    self.module_definitions[module_name][node.name] = node_id
-            elif isinstance(node, ast.Import) or isinstance(node, ast.ImportFrom):
-                self._parse_import(node)
-            elif isinstance(node, ast.Assign):
-                self._parse_assignment(node)
-            else:
-                self._parse_ast(node, build_index, module_name)
+        _ModuleVisitor(self, build_index, module_name).visit(tree)
 
     def _parse_class(self, node: ast.ClassDef) -> str:
         """解析類別定義"""
@@ -180,18 +573,11 @@ class ASTParser:
         
         # 創建類別節點
         # Create class node
-        self.nodes[node_id] = CodeNode(
-            node_id=node_id,
-            node_type="Class",
-            name=node.name,
-            file_path=self.current_file,
-            line_no=node.lineno,
-            end_line_no=getattr(node, "end_lineno", None),
-        )
+        self._add_node(node_id, "Class", node.name, node)
         
         # 創建檔案包含類別的關係
         # Create relationship that file contains class
-        file_node_id = f"file:{self.current_file}"
+        file_node_id = self.current_file_node_id
         self.relations.append(
             CodeRelation(
                 source_id=file_node_id,
@@ -208,12 +594,11 @@ class ASTParser:
                 if base_name in self.imports:
                     # 將此繼承關係添加到待處理隊列
                     # Add this inheritance relationship to the pending queue
-                    self.pending_imports.append({
+                    self._add_pending_import({
                         "type": "EXTENDS",
                         "source_id": node_id,
-                        "imported_module": self.imports[base_name].split(".")[0],
-                        "imported_name": self.imports[base_name].split(".")[-1] 
-                            if "." in self.imports[base_name] else self.imports[base_name],
+                        "imported_module": self.imports[base_name][0],
+                        "imported_name": self.imports[base_name][1],
                         "original_name": base_name
                     })
                 else:
@@ -222,7 +607,7 @@ class ASTParser:
                     self.relations.append(
                         CodeRelation(
                             source_id=node_id,
-                            target_id=f"Class:{self.current_file}:{base_name}:0",
+                            target_id=self._get_node_id("Class", base_name, self.current_file, 0),
                             relation_type="EXTENDS",
                         )
                     )
@@ -233,11 +618,11 @@ class ASTParser:
         
         # 解析類別內部成員
         # Parse class members
+        dispatch = self._class_body_dispatch
         for item in node.body:
-            if isinstance(item, ast.FunctionDef):
-                self._parse_method(item)
-            elif isinstance(item, ast.Assign):
-                self._parse_class_attribute(item)
+            handler = dispatch.get(type(item))
+            if handler is not None:
+                handler(item)
         
         # 恢復上下文
         # Restore context
@@ -248,80 +633,30 @@ class ASTParser:
     def _parse_method(self, node: ast.FunctionDef) -> None:
         """解析類別方法"""
         # Parses class methods
-        node_id = self._get_node_id("Method", node.name, self.current_file, node.lineno)
-        
-        # 創建方法節點
-        # Create method node
-        self.nodes[node_id] = CodeNode(
-            node_id=node_id,
-            node_type="Method",
-            name=node.name,
-            file_path=self.current_file,
-            line_no=node.lineno,
-            end_line_no=getattr(node, "end_lineno", None),
-            properties={"is_method": True},
-        )
-        
-        # 創建類別定義方法的關係
-        # Create relationship that class defines method
-        self.relations.append(
-            CodeRelation(
-                source_id=self.current_class,
-                target_id=node_id,
-                relation_type="DEFINES",
-            )
-        )
-        
-        # 設置當前函數上下文並解析函數體
-        # Set current function context and parse function body
-        prev_function = self.current_function
-        self.current_function = node_id
-        
-        # 解析函數參數
-        # Parse function arguments
-        self._parse_function_args(node, node_id)
-        
-        # 解析函數體
-        # Parse function body
-        # 取得文檔字串（兼容不同 Python 版本）
-        # Retrieve the docstring (compatible across Python versions)
-        doc = ast.get_docstring(node)
-        if doc:
-            self.nodes[node_id].properties["docstring"] = doc
-
-        # 尋找函數調用
-        # Find function calls in the body
-        for item in node.body:
-            self._find_function_calls(item)
-        
-        # 恢復上下文
-        self.current_function = prev_function
+        self._parse_callable(node, "Method", self.current_class, "DEFINES")
 
     def _parse_function(self, node: ast.FunctionDef) -> str:
         """解析函數定義"""
         # Parse a top-level function definition
-        node_id = self._get_node_id("Function", node.name, self.current_file, node.lineno)
+        return self._parse_callable(node, "Function", self.current_file_node_id, "CONTAINS")
 
-        # 創建函數節點
-        # Create function node
-        self.nodes[node_id] = CodeNode(
-            node_id=node_id,
-            node_type="Function",
-            name=node.name,
-            file_path=self.current_file,
-            line_no=node.lineno,
-            end_line_no=getattr(node, "end_lineno", None),
-            properties={"is_method": False},
-        )
+    def _parse_callable(
+        self, node: ast.FunctionDef, kind: str, container_id: Optional[str], container_rel: str
+    ) -> str:
+        """Parse a function or method; kind is its node type, container_id defines or contains it."""
+        node_id = self._get_node_id(kind, node.name, self.current_file, node.lineno)
+
+        # 創建函數或方法節點
+        # Create function or method node
+        self._add_node(node_id, kind, node.name, node, {"is_method": kind == "Method"})
 
-        # 創建檔案包含函數的關係
-        # Create relationship that file contains function
-        file_node_id = f"file:{self.current_file}"
+        # 創建檔案包含函數，或類別定義方法的關係
+        # Create relationship that file contains function / class defines method
         self.relations.append(
             CodeRelation(
-                source_id=file_node_id,
+                source_id=container_id,
                 target_id=node_id,
-                relation_type="CONTAINS",
+                relation_type=container_rel,
             )
         )
 
@@ -338,7 +673,7 @@ class ASTParser:
         # Parse function body
         # 取得文檔字串（兼容不同 Python 版本）
         # Retrieve the docstring (compatible across Python versions)
-        doc = ast.get_docstring(node)
+        doc = _fast_docstring(node)
         if doc:
             self.nodes[node_id].properties["docstring"] = doc
 
@@ -356,80 +691,78 @@ class ASTParser:
     def _parse_function_args(self, node: ast.FunctionDef, node_id: str) -> None:
         """解析函數參數"""
         args = []
+        positional = node.args.args
+        # Defaults belong to the trailing positional parameters; when
+        # positional-only parameters take some of them this goes negative and
+        # every listed parameter has a default.
+        first_default = len(positional) - len(node.args.defaults)
         
-        # 處理位置參數
-        # Handle positional parameters
-        for arg in node.args.args:
+        # 處理位置參數與預設參數
+        # Handle positional parameters and their defaults in a single pass
+        for index, arg in enumerate(positional):
             arg_info = {"name": arg.arg}
-            if arg.annotation:
-                if isinstance(arg.annotation, ast.Name):
-                    arg_info["type"] = arg.annotation.id
+            if isinstance(arg.annotation, ast.Name):
+                arg_info["type"] = arg.annotation.id
+            if index >= first_default:
+                arg_info["has_default"] = True
             args.append(arg_info)
         
-        # 處理預設參數
-        # Handle default parameters
-        defaults = node.args.defaults
-        if defaults:
-            offset = len(args) - len(defaults)
-            for i, default in enumerate(defaults):
-                index = offset + i
-                if index < len(args):
-                    args[index]["has_default"] = True
-        
-        # 將參數列表序列化為JSON字符串，而不是直接存儲字典
-        # Serialize the argument list to a JSON string instead of storing the dict directly
-        self.nodes[node_id].properties["args"] = json.dumps(args)
+        # 直接存儲參數字典列表，寫入 Neo4j 時才序列化為 JSON
+        # The raw list is stored; it is serialized to JSON when written to Neo4j
+        self.nodes[node_id].properties["args"] = args
 
     def _parse_import(self, node: Union[ast.Import, ast.ImportFrom]) -> None:
         """解析導入語句"""
-        file_node_id = f"file:{self.current_file}"
+        file_node_id = self.current_file_node_id
         
         if isinstance(node, ast.Import):
-            for name in node.names:
-                import_name = name.name
-                asname = name.asname or import_name
-                
-                # 添加到導入映射
-                # Add to import mapping
-                self.imports[asname] = import_name
-                
-                # 模組名稱（取第一部分，例如 'package.module' -> 'package'）
-                # Root module name (take the first part, e.g. 'package.module' -> 'package')
-                root_module = import_name.split('.')[0]
-                
-                # 添加到待處理的導入依賴
-                # Add to pending import dependencies
-                self.pending_imports.append({
+            names = [(name.name, name.asname) for name in node.names]
+
+            # 添加到導入映射
+            # Add to import mapping
+            self.imports.update(
+                (asname or import_name, _split_import(import_name)) for import_name, asname in names
+            )
+
+            # 添加到待處理的導入依賴
+            # Add to pending import dependencies; the imported module is the
+            # root module name (e.g. 'package.module' -> 'package'). "alias" is
+            # only recorded for imports that actually use "as".
+            for import_name, asname in names:
+                import_info = {
                     "type": "IMPORTS_MODULE",
                     "source_id": file_node_id,
-                    "imported_module": root_module,
+                    "imported_module": import_name.split('.')[0],
                     "full_module_path": import_name,
-                    "alias": asname
-                })
-        
+                }
+                if asname:
+                    import_info["alias"] = asname
+                self._add_pending_import(import_info)
+
         elif isinstance(node, ast.ImportFrom):
             module_name = node.module
-            for name in node.names:
-                import_name = name.name
-                asname = name.asname or import_name
-                
-                # 添加到導入映射
-                # Add to import mapping (for from ... import ...)
-                if module_name:
-                    full_name = f"{module_name}.{import_name}"
-                    self.imports[asname] = full_name
-                else:
-                    self.imports[asname] = import_name
-                
-                # 添加到待處理的導入依賴
-                # Add to pending import dependencies (symbol import)
-                self.pending_imports.append({
+            names = [(name.name, name.asname) for name in node.names]
+
+            # 添加到導入映射
+            # Add to import mapping (for from ... import ...)
+            prefix = f"{module_name}." if module_name else ""
+            self.imports.update(
+                (asname or import_name, _split_import(prefix + import_name))
+                for import_name, asname in names
+            )
+
+            # 添加到待處理的導入依賴
+            # Add to pending import dependencies (symbol import)
+            for import_name, asname in names:
+                import_info = {
                     "type": "IMPORTS_SYMBOL",
                     "source_id": file_node_id,
                     "imported_module": module_name,
                     "imported_name": import_name,
-                    "alias": asname
-                })
+                }
+                if asname:
+                    import_info["alias"] = asname
+                self._add_pending_import(import_info)
 
     def _parse_assignment(self, node: ast.Assign) -> None:
         """解析賦值語句"""
@@ -441,14 +774,7 @@ class ASTParser:
                 if self.current_class and not self.current_function:
                     # 類別屬性
                     # Class attribute
-                    self.nodes[node_id] = CodeNode(
-                        node_id=node_id,
-                        node_type="ClassVariable",
-                        name=var_name,
-                        file_path=self.current_file,
-                        line_no=node.lineno,
-                        end_line_no=getattr(node, "end_lineno", None),
-                    )
+                    self._add_node(node_id, "ClassVariable", var_name, node)
                     
                     self.relations.append(
                         CodeRelation(
@@ -460,14 +786,7 @@ class ASTParser:
                 elif self.current_function:
                     # 局部變數
                     # Local variable
-                    self.nodes[node_id] = CodeNode(
-                        node_id=node_id,
-                        node_type="LocalVariable",
-                        name=var_name,
-                        file_path=self.current_file,
-                        line_no=node.lineno,
-                        end_line_no=getattr(node, "end_lineno", None),
-                    )
+                    self._add_node(node_id, "LocalVariable", var_name, node)
                     
                     self.relations.append(
                         CodeRelation(
@@ -479,16 +798,9 @@ class ASTParser:
                 else:
                     # 全局變數
                     # Global variable
-                    self.nodes[node_id] = CodeNode(
-                        node_id=node_id,
-                        node_type="GlobalVariable",
-                        name=var_name,
-                        file_path=self.current_file,
-                        line_no=node.lineno,
-                        end_line_no=getattr(node, "end_lineno", None),
-                    )
+                    self._add_node(node_id, "GlobalVariable", var_name, node)
                     
-                    file_node_id = f"file:{self.current_file}"
+                    file_node_id = self.current_file_node_id
                     self.relations.append(
                         CodeRelation(
                             source_id=file_node_id,
@@ -505,14 +817,7 @@ class ASTParser:
                 var_name = target.id
                 node_id = self._get_node_id("ClassVariable", var_name, self.current_file, node.lineno)
                 
-                self.nodes[node_id] = CodeNode(
-                    node_id=node_id,
-                    node_type="ClassVariable",
-                    name=var_name,
-                    file_path=self.current_file,
-                    line_no=node.lineno,
-                    end_line_no=getattr(node, "end_lineno", None),
-                )
+                self._add_node(node_id, "ClassVariable", var_name, node)
                 
                 self.relations.append(
                     CodeRelation(
@@ -524,100 +829,117 @@ class ASTParser:
 
     def _find_function_calls(self, node: ast.AST) -> None:
         """在AST節點中尋找函數調用"""
-        # Search for function calls in AST nodes
-        if isinstance(node, ast.Call):
-            func = node.func
+        # Search for function calls in AST nodes.
+        # Iterative pre-order walk: same visiting order as the former
+        # recursion, without a Python frame per node or recursion limits.
+        stack = [node]
+        handle_call = self._handle_call
+        while stack:
+            current = stack.pop()
+            # Identity checks instead of isinstance: ast node classes are
+            # never subclassed, so the MRO walk buys nothing here
+            if current.__class__ is _Call:
+                handle_call(current)
+            children = [
+                child for child in _iter_child_nodes(current)
+                if child.__class__ not in _LEAF_TYPES
+            ]
+            children.reverse()
+            stack.extend(children)
+
+    def _handle_call(self, node: ast.Call) -> None:
+        """Record a single call found inside the current function."""
+        func = node.func
+        
+        if func.__class__ is _Name:
+            # 直接函數調用
+            # Direct function call
+            func_name = func.id
             
-            if isinstance(func, ast.Name):
-                # 直接函數調用
-                # Direct function call
-                func_name = func.id
+            if func_name in self.imports:
+                # 處理導入的函數調用
+                # Handle calls to imported functions
+                imported_root, imported_func = self.imports[func_name][:2]
+                # 將調用添加到待處理隊列
+                # Add the call to the pending queue
+                if self.current_function:
+                    self._add_pending_import({
+                        "type": "CALLS",
+                        "source_id": self.current_function,
+                        "imported_module": imported_root,
+                        "imported_name": imported_func,
+                        "original_name": func_name
+                    })
+            elif self.current_function:
+                # 處理本地函數調用
+                # Handle calls to local functions
+                self.relations.append(
+                    CodeRelation(
+                        source_id=self.current_function,
+                        target_id=self._get_node_id("Function", func_name, self.current_file, 0),  # 假設的目標ID
+                        # Assumed target ID
+                        relation_type="CALLS",
+                    )
+                )
+        
+        elif func.__class__ is _Attribute:
+            # 調用物件的方法
+            # Method call on an object
+            if func.value.__class__ is _Name:
+                obj_name = func.value.id
+                method_name = func.attr
                 
-                if func_name in self.imports:
-                    # 處理導入的函數調用
-                    # Handle calls to imported functions
-                    imported_func = self.imports[func_name]
+                if obj_name in self.imports:
+                    # 處理導入的類別/模組的方法調用
+                    # Handle method calls on imported classes/modules
+                    imported_root, imported_obj = self.imports[obj_name][:2]
                     # 將調用添加到待處理隊列
                     # Add the call to the pending queue
                     if self.current_function:
-                        self.pending_imports.append({
-                            "type": "CALLS",
+                        self._add_pending_import({
+                            "type": "CALLS_METHOD",
                             "source_id": self.current_function,
-                            "imported_module": imported_func.split(".")[0] 
-                                if "." in imported_func else imported_func,
-                            "imported_name": imported_func.split(".")[-1] 
-                                if "." in imported_func else imported_func,
-                            "original_name": func_name
+                            "imported_module": imported_root,
+                            "imported_class": imported_obj,
+                            "method_name": method_name,
+                            "original_obj_name": obj_name
                         })
                 elif self.current_function:
-                    # 處理本地函數調用
-                    # Handle calls to local functions
+                    # 處理本地物件方法調用
+                    # Handle method calls on local objects
                     self.relations.append(
                         CodeRelation(
                             source_id=self.current_function,
-                            target_id=f"Function:{self.current_file}:{func_name}:0",  # 假設的目標ID
-                            # Assumed target ID
+                            target_id=self._get_node_id("Method", method_name, self.current_file, 0),  # 假設的目標ID
                             relation_type="CALLS",
+                            properties={"object": obj_name},
                         )
                     )
-            
-            elif isinstance(func, ast.Attribute):
-                # 調用物件的方法
-                # Method call on an object
-                if isinstance(func.value, ast.Name):
-                    obj_name = func.value.id
-                    method_name = func.attr
-                    
-                    if obj_name in self.imports:
-                        # 處理導入的類別/模組的方法調用
-                        # Handle method calls on imported classes/modules
-                        imported_obj = self.imports[obj_name]
-                        # 將調用添加到待處理隊列
-                        # Add the call to the pending queue
-                        if self.current_function:
-                            self.pending_imports.append({
-                                "type": "CALLS_METHOD",
-                                "source_id": self.current_function,
-                                "imported_module": imported_obj.split(".")[0] 
-                                    if "." in imported_obj else imported_obj,
-                                "imported_class": imported_obj.split(".")[-1] 
-                                    if "." in imported_obj else imported_obj,
-                                "method_name": method_name,
-                                "original_obj_name": obj_name
-                            })
-                    elif self.current_function:
-                        # 處理本地物件方法調用
-                        # Handle method calls on local objects
-                        self.relations.append(
-                            CodeRelation(
-                                source_id=self.current_function,
-                                target_id=f"Method:{self.current_file}:{method_name}:0",  # 假設的目標ID
-                                relation_type="CALLS",
-                                properties={"object": obj_name},
-                            )
-                        )
-        
-        # 遞迴查找嵌套的函數調用
-        # Recursively search for nested function calls
-        for child in ast.iter_child_nodes(node):
-            self._find_function_calls(child)
-            
+
+    def _add_pending_import(self, import_info: Dict[str, Any]) -> None:
+        """Queue a cross-file dependency unless the current file already queued an identical one."""
+        # Repeated identical entries (e.g. the same imported function called
+        # many times in one function) resolve to nothing new in the second pass
+        key = tuple(import_info.values())
+        if key not in self._pending_seen:
+            self._pending_seen.add(key)
+            self.pending_by_source.setdefault(import_info["source_id"], []).append(import_info)
+
     def _add_relation(self, relation: CodeRelation) -> None:
         """添加關係，避免重複"""
         # 創建關係的唯一標識
-        relation_key = f"{relation.source_id}|{relation.relation_type}|{relation.target_id}"
+        relation_key: Tuple[Optional[str], ...] = (relation.source_id, relation.relation_type, relation.target_id)
         
         # 對於某些關係類型，還需要考慮屬性
         # For some relation types, attributes must be considered
-        if relation.relation_type == "IMPORTS_FROM":
-            # 對於導入關係，同一個檔案導入同一個模組只需記錄一次
-            # For import relationships, recording once per file-module is sufficient
-            relation_key = f"{relation.source_id}|{relation.relation_type}|{relation.target_id}"
-        elif relation.relation_type == "IMPORTS_DEFINITION":
+        # 對於導入關係，同一個檔案導入同一個模組只需記錄一次
+        # IMPORTS_FROM: recording once per file-module is sufficient, which the
+        # default key already does
+        if relation.relation_type == "IMPORTS_DEFINITION":
             # 對於符號導入，需要考慮符號名稱
             # For symbol imports, include the symbol name in the key
             symbol = relation.properties.get("symbol", "")
-            relation_key = f"{relation.source_id}|{relation.relation_type}|{relation.target_id}|{symbol}"
+            relation_key = (relation.source_id, relation.relation_type, relation.target_id, symbol)
         
         # 檢查是否已經存在相同的關係
         # Check whether the same relation already exists
@@ -625,12 +947,15 @@ class ASTParser:
             self.relations.append(relation)
             self.established_relations.add(relation_key)
 
-    def _process_pending_imports(self) -> None:
+    def _process_pending_imports(self, class_methods: Optional[Dict[Tuple[str, str], str]] = None) -> None:
         """處理所有待處理的導入關係"""
-        # Process all pending import relationships
+        # Process all pending import relationships; class_methods is the
+        # (class id, method name) -> method id index when the caller already
+        # has one, otherwise it is built from self.nodes / self.relations
         # print(f"處理跨檔案依賴關係，共 {len(self.pending_imports)} 項")
         # Disabled Chinese log above.
-        print(f"Processing cross-file dependencies, total {len(self.pending_imports)} items")
+        pending_count = sum(len(imports) for imports in self.pending_by_source.values())
+        logger.info("Processing cross-file dependencies, total %d items", pending_count)
         
         # 先創建所有模組節點，將它們與檔案節點關聯
         # First create all module nodes and associate them with file nodes
@@ -643,195 +968,341 @@ class ASTParser:
                 file_node.properties["module_name"] = module_name
         
         # 按模組分組處理導入信息
-        # Group pending import information by source module/file
-        imports_by_source_module = {}
-        for import_info in self.pending_imports:
-            source_id = import_info["source_id"]
-            if source_id not in imports_by_source_module:
-                imports_by_source_module[source_id] = []
-            imports_by_source_module[source_id].append(import_info)
-        
+        # Pending import information is already grouped by source module/file
         # 處理每個源文件的導入
         # Process imports for each source file
-        for source_id, imports in imports_by_source_module.items():
+        # Modules with a file in the project; imports of anything else
+        # (standard library, third-party packages) can never resolve
+        known_modules = self.module_definitions.keys() | self.module_to_file.keys()
+        dispatch = self._pending_resolvers(class_methods)
+        for source_id, imports in self.pending_by_source.items():
             # 跟踪已經處理過的模組導入
             # Track modules already processed for this source
-            processed_modules = set()
+            processed_modules: Set[str] = set()
             
             for import_info in imports:
-                import_type = import_info["type"]
-                
-                if import_type == "IMPORTS_MODULE":
-                    # 檔案導入整個模組的情況
-                    # Case: the file imports a module
-                    module_name = import_info["imported_module"]
-                    
-                    # 避免重複處理相同模組的導入
-                    # Avoid processing the same module import multiple times
-                    if module_name in processed_modules:
-                        continue
+                if import_info.get("imported_module") not in known_modules:
+                    continue
+                resolve = dispatch.get(import_info["type"])
+                if resolve is not None:
+                    resolve(source_id, import_info, processed_modules)
+
+    def _pending_resolvers(
+        self, class_methods: Optional[Dict[Tuple[str, str], str]] = None
+    ) -> Dict[str, Callable[[str, Dict[str, Any], Set[str]], None]]:
+        """
+        Build the resolvers for one pass over the pending import entries, keyed by entry type.
+
+        Each resolver takes (source_id, import_info, processed_modules). The
+        names they use for every entry are bound once here, so resolving an
+        entry does no attribute or global lookups for them.
+        """
+        module_definitions = self.module_definitions
+        module_to_file = self.module_to_file
+        add_relation = self._add_relation
+        Relation = CodeRelation
+
+        def resolve_module_import(source_id: str, import_info: Dict[str, Any], processed_modules: Set[str]) -> None:
+            # 檔案導入整個模組的情況
+            # Case: the file imports a module
+            module_name = import_info["imported_module"]
+
+            # 避免重複處理相同模組的導入
+            # Avoid processing the same module import multiple times
+            if module_name in processed_modules:
+                return
+            processed_modules.add(module_name)
+
+            # 查找模組對應的檔案節點
+            # Find the file node corresponding to the module
+            target_file_id = module_to_file.get(module_name)
+            if target_file_id is not None:
+
+                # 創建檔案間依賴關係
+                # Create a file-to-file dependency relation
+                add_relation(
+                    Relation(
+                        source_id=source_id,
+                        target_id=target_file_id,
+                        relation_type="IMPORTS_FROM",
+                        properties={
+                            "module": module_name,
+                            "full_module_path": import_info.get("full_module_path", module_name)
+                        }
+                    )
+                )
+
+        def resolve_symbol_import(source_id: str, import_info: Dict[str, Any], processed_modules: Set[str]) -> None:
+            # 從模組導入特定符號的情況
+            # Case: importing a specific symbol from a module
+            module_name = import_info["imported_module"]
+            symbol_name = import_info["imported_name"]
+
+            # 檢查模組定義索引
+            # Check module definitions index
+            target_node_id = module_definitions.get(module_name, _NO_DEFINITIONS).get(symbol_name)
+            if target_node_id is not None:
+
+                # 創建檔案到符號的依賴關係
+                # Create a dependency from the source file to the symbol node
+                add_relation(
+                    Relation(
+                        source_id=source_id,
+                        target_id=target_node_id,
+                        relation_type="IMPORTS_DEFINITION",
+                        properties={
+                            "module": module_name,
+                            "symbol": symbol_name,
+                            # Entries without "alias" were imported under their own name
+                            "alias": import_info.get("alias", symbol_name)
+                        }
+                    )
+                )
+
+                # 避免為已處理的模組重複創建IMPORTS_FROM關係
+                # Avoid creating duplicate IMPORTS_FROM relations for the same module
+                if module_name not in processed_modules and module_name in module_to_file:
                     processed_modules.add(module_name)
-                    
-                    # 查找模組對應的檔案節點
-                    # Find the file node corresponding to the module
-                    if module_name in self.module_to_file:
-                        target_file_id = self.module_to_file[module_name]
-                        
-                        # 創建檔案間依賴關係
-                        # Create a file-to-file dependency relation
-                        self._add_relation(
-                            CodeRelation(
-                                source_id=source_id,
-                                target_id=target_file_id,
-                                relation_type="IMPORTS_FROM",
-                                properties={
-                                    "module": module_name,
-                                    "full_module_path": import_info.get("full_module_path", module_name)
-                                }
-                            )
-                        )
-                
-                elif import_type == "IMPORTS_SYMBOL":
-                    # 從模組導入特定符號的情況
-                    # Case: importing a specific symbol from a module
-                    module_name = import_info["imported_module"]
-                    symbol_name = import_info["imported_name"]
-                    
-                    # 檢查模組定義索引
-                    # Check module definitions index
-                    if module_name in self.module_definitions and symbol_name in self.module_definitions[module_name]:
-                        target_node_id = self.module_definitions[module_name][symbol_name]
-                        
-                        # 創建檔案到符號的依賴關係
-                        # Create a dependency from the source file to the symbol node
-                        self._add_relation(
-                            CodeRelation(
-                                source_id=source_id,
-                                target_id=target_node_id,
-                                relation_type="IMPORTS_DEFINITION",
-                                properties={
-                                    "module": module_name,
-                                    "symbol": symbol_name,
-                                    "alias": import_info.get("alias")
-                                }
-                            )
-                        )
-                        
-                        # 避免為已處理的模組重複創建IMPORTS_FROM關係
-                        # Avoid creating duplicate IMPORTS_FROM relations for the same module
-                        if module_name not in processed_modules and module_name in self.module_to_file:
-                            processed_modules.add(module_name)
-                            
-                            # 創建到檔案的導入關係
-                            # Create an IMPORTS_FROM relation to the module's file node
-                            self._add_relation(
-                                CodeRelation(
-                                    source_id=source_id,
-                                    target_id=self.module_to_file[module_name],
-                                    relation_type="IMPORTS_FROM",
-                                    properties={
-                                        "module": module_name,
-                                        "imports_symbols": [symbol_name]
-                                    }
-                                )
-                            )
-                
-                elif import_type == "EXTENDS":
-                    # 類別繼承關係
-                    # Class inheritance relationship
-                    module_name = import_info["imported_module"]
-                    class_name = import_info["imported_name"]
-                    
-                    # 檢查模組定義索引
-                    # Check module definitions index
-                    if module_name in self.module_definitions and class_name in self.module_definitions[module_name]:
-                        target_node_id = self.module_definitions[module_name][class_name]
-                        
-                        # 創建繼承關係
-                        # Create an EXTENDS (inheritance) relation
-                        self._add_relation(
-                            CodeRelation(
-                                source_id=source_id,
-                                target_id=target_node_id,
-                                relation_type="EXTENDS",
-                                properties={"original_name": import_info.get("original_name")}
-                            )
+
+                    # 創建到檔案的導入關係
+                    # Create an IMPORTS_FROM relation to the module's file node
+                    add_relation(
+                        Relation(
+                            source_id=source_id,
+                            target_id=module_to_file[module_name],
+                            relation_type="IMPORTS_FROM",
+                            properties={
+                                "module": module_name,
+                                "imports_symbols": [symbol_name]
+                            }
                         )
-                
-                elif import_type == "CALLS":
-                    # 函數調用關係
-                    # Function call relationship
-                    module_name = import_info["imported_module"]
-                    func_name = import_info["imported_name"]
-                    
-                    # 檢查模組定義索引
-                    # Check module definitions index
-                    if module_name in self.module_definitions and func_name in self.module_definitions[module_name]:
-                        target_node_id = self.module_definitions[module_name][func_name]
-                        
-                        # 創建調用關係
-                        # Create a CALLS relation
-                        self._add_relation(
-                            CodeRelation(
-                                source_id=source_id,
-                                target_id=target_node_id,
-                                relation_type="CALLS",
-                                properties={"original_name": import_info.get("original_name")}
-                            )
+                    )
+
+        def resolve_extends(source_id: str, import_info: Dict[str, Any], processed_modules: Set[str]) -> None:
+            # 類別繼承關係
+            # Class inheritance relationship
+            target_node_id = module_definitions.get(import_info["imported_module"], _NO_DEFINITIONS).get(
+                import_info["imported_name"]
+            )
+            if target_node_id is not None:
+
+                # 創建繼承關係
+                # Create an EXTENDS (inheritance) relation
+                add_relation(
+                    Relation(
+                        source_id=source_id,
+                        target_id=target_node_id,
+                        relation_type="EXTENDS",
+                        properties=_original_name_properties(import_info),
+                    )
+                )
+
+        def resolve_call(source_id: str, import_info: Dict[str, Any], processed_modules: Set[str]) -> None:
+            # 函數調用關係
+            # Function call relationship
+            target_node_id = module_definitions.get(import_info["imported_module"], _NO_DEFINITIONS).get(
+                import_info["imported_name"]
+            )
+            if target_node_id is not None:
+
+                # 創建調用關係
+                # Create a CALLS relation
+                add_relation(
+                    Relation(
+                        source_id=source_id,
+                        target_id=target_node_id,
+                        relation_type="CALLS",
+                        properties=_original_name_properties(import_info),
+                    )
+                )
+
+        def resolve_method_call(source_id: str, import_info: Dict[str, Any], processed_modules: Set[str]) -> None:
+            nonlocal class_methods
+            # 物件方法調用關係
+            # Method call on an imported object/class
+            class_name = import_info["imported_class"]
+
+            # 檢查模組定義索引中的類別
+            # Check that the class exists in the module definitions index
+            class_node_id = module_definitions.get(import_info["imported_module"], _NO_DEFINITIONS).get(class_name)
+            if class_node_id is not None:
+
+                # 尋找該類別定義的方法
+                # Find the method defined in that class node
+                # The (class id, method name) index is built on first use
+                # unless the caller passed one
+                if class_methods is None:
+                    class_methods = self._build_class_method_index()
+                method_node_id = class_methods.get((class_node_id, import_info["method_name"]))
+                if method_node_id is not None:
+                    # 創建調用關係
+                    # Create a CALLS relation to the method node
+                    add_relation(
+                        Relation(
+                            source_id=source_id,
+                            target_id=method_node_id,
+                            relation_type="CALLS",
+                            properties={
+                                "object": import_info.get("original_obj_name"),
+                                "class": class_name
+                            }
                         )
-                
-                elif import_type == "CALLS_METHOD":
-                    # 物件方法調用關係
-                    # Method call on an imported object/class
-                    module_name = import_info["imported_module"]
-                    class_name = import_info["imported_class"]
-                    method_name = import_info["method_name"]
-                    
-                    # 檢查模組定義索引中的類別
-                    # Check that the class exists in the module definitions index
-                    if module_name in self.module_definitions and class_name in self.module_definitions[module_name]:
-                        class_node_id = self.module_definitions[module_name][class_name]
-                        
-                        # 尋找該類別定義的方法
-                        # Find the method defined in that class node
-                        for relation in self.relations:
-                            if relation.source_id == class_node_id and relation.relation_type == "DEFINES":
-                                # 確保 target_id 不是 None 再使用
-                                # Ensure target_id is not None before using it
-                                if relation.target_id is None:
-                                    continue
-                                target_node = self.nodes.get(relation.target_id)
-                                if target_node and target_node.node_type == "Method" and target_node.name == method_name:
-                                    # 創建調用關係
-                                    # Create a CALLS relation to the method node
-                                    self._add_relation(
-                                        CodeRelation(
-                                            source_id=source_id,
-                                            target_id=relation.target_id,
-                                            relation_type="CALLS",
-                                            properties={
-                                                "object": import_info.get("original_obj_name"),
-                                                "class": class_name
-                                            }
-                                        )
-                                    )
-                                    break
+                    )
 
+        return {
+            "IMPORTS_MODULE": resolve_module_import,
+            "IMPORTS_SYMBOL": resolve_symbol_import,
+            "EXTENDS": resolve_extends,
+            "CALLS": resolve_call,
+            "CALLS_METHOD": resolve_method_call,
+        }
 
-# 使用範例
-# Usage example
-if __name__ == "__main__":
+    def _build_class_method_index(self) -> Dict[Tuple[str, str], str]:
+        """Map (class node id, method name) to the method node id from the DEFINES relations."""
+        class_methods: Dict[Tuple[str, str], str] = {}
+        _index_class_methods(class_methods, self.nodes, self.relations)
+        return class_methods
+
+
+class _ModuleVisitor(ast.NodeVisitor):
+    """Walks a module's AST and hands definitions, imports and assignments to the parser."""
+
+    def __init__(self, parser: ASTParser, build_index: bool, module_name: str) -> None:
+        self.parser = parser
+        # Definitions are only indexed when building the module index
+        self.definitions: Optional[Dict[str, str]] = parser.module_definitions[module_name] if build_index and module_name else None
+        # Class-keyed handlers, so visit() does one dict lookup per node
+        # instead of building a "visit_<name>" string and calling getattr
+        self._dispatch: Dict[type, Callable[[Any], None]] = {
+            ast.ClassDef: self.visit_ClassDef,
+            ast.FunctionDef: self.visit_FunctionDef,
+            ast.Import: self.visit_Import,
+            ast.ImportFrom: self.visit_ImportFrom,
+            ast.Assign: self.visit_Assign,
+        }
+
+    def visit(self, node: ast.AST) -> None:
+        handler = self._dispatch.get(node.__class__)
+        if handler is None:
+            self.generic_visit(node)
+        else:
+            handler(node)
+
+    # Class and function bodies are handled by the parser, so these handlers
+    # do not descend any further; any other node falls back to generic_visit.
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        node_id = self.parser._parse_class(node)
+        if self.definitions is not None:
+            self.definitions[node.name] = node_id
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        node_id = self.parser._parse_function(node)
+        if self.definitions is not None:
+            self.definitions[node.name] = node_id
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self.parser._parse_import(node)
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self.parser._parse_assignment(node)
+
+
+def _iter_py_files(directory_path: str) -> Iterator[str]:
+    """Yield the .py files under directory_path in os.walk order.
+
+    Uses os.scandir so the file/directory checks come from the cached
+    DirEntry data instead of extra stat calls. Like os.walk, symlinked
+    directories are not followed and unreadable directories are skipped.
+    Directories are walked with an explicit stack rather than nested
+    generators, so deep trees cost no extra per-file delegation.
+    """
+    stack = [directory_path]
+    while stack:
+        current = stack.pop()
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(".py"):
+                        files.append(entry.path)
+        except OSError:
+            continue
+
+        yield from files
+        # Reversed so subdirectories are popped, and walked, in listing order
+        subdirs.reverse()
+        stack.extend(subdirs)
+
+
+def _parse_file_worker(file_path: str, source: Optional[bytes] = None) -> ParseResult:
+    """Parse one file with a fresh parser; runs inside the processing pool."""
+    parser = ASTParser()
+    # Caching happens in the caller, which owns the shared cache
+    parser.cache_path = None
+    parser.parse_file(file_path, build_index=True, source=source)
+    return parser._export_file_result()
+
+
+def _parse_cached_file_worker(
+    file_path: str, source: Optional[bytes] = None
+) -> Tuple[ParseResult, Optional[str]]:
+    """Parse one file for the parse cache, also returning the digest of the bytes parsed."""
+    if source is None:
+        source = _read_source(file_path)
+    digest = None if source is None else content_digest(source)
+    return _parse_file_worker(file_path, source), digest
+
+
+def _read_source(file_path: str) -> Optional[bytes]:
+    """Read a file's bytes, or None so parse_file reports the error itself."""
+    try:
+        with open(file_path, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def _prefetch_sources(file_paths: List[str], depth: int = 8) -> Iterator[Optional[bytes]]:
+    """Yield each file's bytes in order, reading up to depth files ahead on threads."""
+    remaining = iter(file_paths)
+    with ThreadPoolExecutor(max_workers=4) as reader:
+        pending = deque(reader.submit(_read_source, file_path) for file_path in islice(remaining, depth))
+        while pending:
+            source = pending.popleft().result()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append(reader.submit(_read_source, next_path))
+            yield source
+
+
+def _demo(file_path: str = "example.py") -> None:
+    """Parse a single file and print what was found."""
     parser = ASTParser()
-    nodes, relations = parser.parse_file("example.py")
+    nodes, relations = parser.parse_file(file_path)
     
     # print("找到的節點:")
     # Disabled Chinese sample log above.
-    print("Found nodes:")
-    for node in nodes.values():
-        print(f"  {node}")
+    # Written from generators so large outputs are never joined in memory
+    sys.stdout.write("Found nodes:\n")
+    sys.stdout.writelines(f"  {node}\n" for node in nodes.values())
     
     # print("\n找到的關係:")
     # Disabled Chinese sample log above.
-    print("\nFound relations:")
-    for relation in relations:
-        print(f"  {relation}")
\ No newline at end of file
+    sys.stdout.write("\nFound relations:\n")
+    sys.stdout.writelines(f"  {relation}\n" for relation in relations)
+
+
+# 使用範例
+# Usage example
+if __name__ == "__main__":
+    _demo(*sys.argv[1:2])
@@ -1,14 +1,107 @@
 import os
+import sys
 import logging
-from typing import Dict, List, Optional, Tuple, Any, Set
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple, Any, Set
 import tree_sitter_javascript
 import tree_sitter_typescript
-from tree_sitter import Language, Parser, Node, Query, QueryCursor
+from tree_sitter import Language, Parser, Node, Query, QueryCursor, Tree
 
-from src.ast_parser.parser import CodeNode, CodeRelation
+from src.ast_parser.parse_cache import content_digest
+from src.ast_parser.parser import CodeNode, CodeRelation, _read_source
 
 logger = logging.getLogger(__name__)
 
+# Every pattern the extractors need, matched in a single pass over the tree.
+# Capture names are prefixed with the extractor that consumes them.
+_EXTRACTION_QUERY = """
+(function_declaration name: (identifier) @function.name) @function
+(lexical_declaration (variable_declarator name: (identifier) @arrow.name value: (arrow_function) @arrow))
+(class_declaration) @class
+(lexical_declaration (variable_declarator name: (identifier) @lexical.name)) @lexical.declaration
+(variable_declaration (variable_declarator name: (identifier) @var.name)) @var.declaration
+(variable_declarator value: (arrow_function)) @arrow.declarator
+(import_statement) @import
+(export_statement) @export
+[(function_declaration) (arrow_function) (class_declaration) (method_definition)] @scope
+"""
+
+# (declaration, name) capture pairs for const/let and var declarations
+_VARIABLE_CAPTURES = (
+    ("lexical.declaration", "lexical.name"),
+    ("var.declaration", "var.name"),
+)
+
+# Tree-sitter languages and compiled queries are shared by all parser
+# instances: MultiLanguageParser creates a new TypeScriptParser per file, and
+# compiling a query is far more expensive than running it.
+_LANGUAGE_FACTORIES = {
+    "javascript": tree_sitter_javascript.language,
+    "typescript": tree_sitter_typescript.language_typescript,
+    "tsx": tree_sitter_typescript.language_tsx,
+}
+_LANGUAGES: Dict[str, Language] = {}
+_QUERY_CACHE: Dict[Tuple[int, str], Query] = {}
+
+
+# File extensions handled by this parser
+_SOURCE_EXTENSIONS = frozenset(("js", "ts", "jsx", "tsx"))
+
+# Language property value by lowercase file extension (without the dot);
+# anything else is JavaScript
+_LANGUAGE_BY_EXTENSION = {"ts": "typescript", "tsx": "tsx", "jsx": "jsx"}
+
+# Number of recently parsed syntax trees kept for incremental re-parsing
+_TREE_CACHE_SIZE = 16
+
+# Directories holding dependencies or VCS data rather than project sources
+_SKIPPED_DIRS = frozenset(("node_modules", ".git"))
+
+
+class _SpanSet:
+    """Byte spans of syntax nodes, answering whether a node lies inside one of them.
+
+    Spans of syntax nodes are either nested or disjoint, so a node lies
+    inside some span exactly when a span starting at or before it ends at
+    or after its end. A running maximum of span ends, ordered by start,
+    answers that with a single binary search.
+    """
+
+    __slots__ = ("_starts", "_max_ends")
+
+    def __init__(self, nodes: List[Node]):
+        spans = sorted((node.start_byte, node.end_byte) for node in nodes)
+        self._starts = [start for start, _ in spans]
+        self._max_ends = list(accumulate((end for _, end in spans), max))
+
+    def encloses(self, node: Node) -> bool:
+        """Return True if node lies inside one of the spans."""
+        index = bisect_right(self._starts, node.start_byte) - 1
+        return index >= 0 and self._max_ends[index] >= node.end_byte
+
+
+def _get_language(name: str) -> Language:
+    """Return the shared tree-sitter Language for name, loading it on first use."""
+    language = _LANGUAGES.get(name)
+    if language is None:
+        language = _LANGUAGES[name] = Language(_LANGUAGE_FACTORIES[name]())
+    return language
+
+
+def _get_query(language: Language, query_str: str) -> Query:
+    """Return the compiled query for language, compiling it on first use.
+
+    Languages come from _get_language and live as long as the module, so
+    their id() is a stable cache key.
+    """
+    key = (id(language), query_str)
+    query = _QUERY_CACHE.get(key)
+    if query is None:
+        query = _QUERY_CACHE[key] = Query(language, query_str)
+    return query
+
 
 class TypeScriptParser:
     """Parser for JavaScript and TypeScript files using tree-sitter.
@@ -18,28 +111,53 @@ class TypeScriptParser:
     the Python ASTParser, ensuring compatibility with the rest of the system.
     """
 
-    def __init__(self):
-        """Initialize the TypeScript/JavaScript parser."""
+    def __init__(self, cache_path: Optional[str] = None):
+        """Initialize the TypeScript/JavaScript parser.
+        
+        Args:
+            cache_path: Optional on-disk parse cache shared with ASTParser;
+                falls back to the PARSE_CACHE_PATH environment variable,
+                disabled when empty
+        """
         self.nodes: Dict[str, CodeNode] = {}
         self.relations: List[CodeRelation] = []
         self.current_file: str = ""
+        self.current_file_node_id: str = ""
+        # Language property of the current file's entities
+        self.current_language: str = "javascript"
+        # "<type>:<file>:" node id prefixes of the current file, by node type
+        self._id_prefixes: Dict[str, str] = {}
         self.current_function: Optional[str] = None
         self.current_class: Optional[str] = None
+        # Spans of the current file's classes and function/class scopes
+        self._class_spans = _SpanSet([])
+        self._scope_spans = _SpanSet([])
         self.imports: Dict[str, str] = {}
+        # Imported name -> (first, last) dotted part of its source module
+        self._import_parts: Dict[str, Tuple[str, str]] = {}
         self.module_definitions: Dict[str, Dict[str, str]] = {}
         self.pending_imports: List[Dict[str, Any]] = []
         self.module_to_file: Dict[str, str] = {}
         self.established_relations: Set[str] = set()
+        self.cache_path: Optional[str] = cache_path or os.environ.get("PARSE_CACHE_PATH") or None
+        # Recently parsed trees by file path, least recently used first, and
+        # the paths whose tree has been edited and may seed the next parse
+        self._trees: "OrderedDict[str, Tree]" = OrderedDict()
+        self._edited_trees: Set[str] = set()
         
         # Initialize tree-sitter parsers for JavaScript and TypeScript
         try:
-            self.js_language = Language(tree_sitter_javascript.language())
-            self.ts_language = Language(tree_sitter_typescript.language_typescript())
-            self.tsx_language = Language(tree_sitter_typescript.language_tsx())
+            self.js_language = _get_language("javascript")
+            self.ts_language = _get_language("typescript")
+            self.tsx_language = _get_language("tsx")
             self.js_parser = Parser(self.js_language)
             self.ts_parser = Parser(self.ts_language)
             self.tsx_parser = Parser(self.tsx_language)
-            logger.info("TypeScriptParser initialized successfully")
+            # Parser and query language by lowercase file extension; anything
+            # else (.js, .jsx) uses JavaScript
+            self._parser_by_ext = {"ts": self.ts_parser, "tsx": self.tsx_parser}
+            self._language_by_ext = {"ts": self.ts_language, "tsx": self.tsx_language}
+            logger.debug("TypeScriptParser initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize TypeScriptParser: {e}")
             raise
@@ -60,31 +178,88 @@ class TypeScriptParser:
         self.module_to_file = {}
         self.established_relations = set()
 
-        # First pass: create all nodes and build module definition index
-        for root, _, files in os.walk(directory_path):
-            for file_name in files:
-                if file_name.endswith(('.js', '.ts', '.jsx', '.tsx')):
-                    file_path = os.path.join(root, file_name)
-                    self.parse_file(file_path, build_index=True)
+        file_paths = list(_iter_source_files(directory_path))
+
+        # Unchanged files are served from the parse cache when one is configured
+        cache = None
+        stamps: Dict[str, Any] = {}
+        cached: Dict[str, Tuple[Any, ...]] = {}
+        if self.cache_path:
+            from src.ast_parser.parse_cache import get_parse_cache
+
+            cache = get_parse_cache(self.cache_path)
+            for file_path in file_paths:
+                stamp = stamps[file_path] = cache.stamp(file_path)
+                hit = cache.get(file_path, stamp)
+                if hit is not None:
+                    cached[file_path] = hit
+        misses = [file_path for file_path in file_paths if file_path not in cached]
+
+        # First pass: create all nodes and build module definition index.
+        # Files are independent, so they are parsed by the processing pool
+        # and merged back in their original order.
+        from src.parallel.pool_manager import get_processing_pool
+
+        # With a cache, workers also return the digest of the bytes they parsed
+        worker = _parse_file_worker if cache is None else _parse_cached_file_worker
+        with get_processing_pool(item_count=len(misses)) as pool:
+            if pool.executor_type == "sequential":
+                parsed = map(worker, misses)
+            else:
+                parsed = iter(pool.map(worker, misses, chunksize=16))
+            for file_path in file_paths:
+                result = cached.get(file_path)
+                if result is None:
+                    if cache is None:
+                        result = next(parsed)
+                    else:
+                        result, digest = next(parsed)
+                        cache.put(file_path, stamps[file_path], result, digest)
+                self._merge_file_result(result)
+
+        # Persist newly parsed files before the import resolution pass, dropping
+        # the entries of files that no longer exist
+        if cache is not None:
+            cache.prune(directory_path, file_paths, tuple("." + ext for ext in _SOURCE_EXTENSIONS))
+            cache.save()
 
         # Second pass: process all pending import relationships
         self._process_pending_imports()
 
         return self.nodes, self.relations
 
-    def parse_file(self, file_path: str, build_index: bool = False) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
+    def parse_file(
+        self,
+        file_path: str,
+        build_index: bool = False,
+        edits: Optional[List[Dict[str, Any]]] = None,
+        source: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
         """Parse a single JavaScript/TypeScript file.
         
         Args:
             file_path: Path to the file to parse
             build_index: Whether to build module definition index
+            edits: Edits made to the file since this parser last parsed it,
+                applied with apply_edit before parsing
+            source: The file's already-read content, saving a second read
             
         Returns:
             Tuple of (nodes dictionary, relations list)
         """
+        for edit in edits or ():
+            self.apply_edit(file_path, edit)
+
+        if build_index and self.cache_path:
+            return self._parse_file_cached(file_path, source)
+
         print(f"Parsing file: {file_path}")
-        self.current_file = file_path
+        self.current_file = sys.intern(file_path)
+        self.current_file_node_id = f"file:{file_path}"
+        self.current_language = self._get_language_from_file()
         self.imports = {}
+        self._import_parts = {}
+        self._id_prefixes = {}
         
         # Reset nodes and relations if not building an index (standalone parse)
         if not build_index:
@@ -92,25 +267,38 @@ class TypeScriptParser:
             self.relations = []
 
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                file_content = file.read()
-                
-                # Select appropriate parser based on file extension
-                parser = self._get_parser_for_file(file_path)
-                tree = parser.parse(bytes(file_content, "utf8"))
-                
-                file_node_id = self._create_file_node(file_path)
-                
-                # Generate module name for indexing
-                module_name = os.path.splitext(os.path.basename(file_path))[0]
-                if build_index:
-                    if module_name not in self.module_definitions:
-                        self.module_definitions[module_name] = {}
-                    # Associate module name with file node
-                    self.module_to_file[module_name] = file_node_id
-                
-                # Parse the syntax tree
-                self._parse_tree(tree.root_node, file_content, build_index, module_name)
+            # Tree-sitter works on bytes, so the file is never decoded as a whole
+            source_code = source
+            if source_code is None:
+                with open(file_path, "rb") as file:
+                    source_code = file.read()
+            
+            # Select appropriate parser based on file extension
+            parser = self._get_parser_for_file(file_path)
+            # An edited tree from an earlier parse lets tree-sitter reuse the
+            # unchanged parts of the file
+            old_tree = None
+            if file_path in self._edited_trees:
+                self._edited_trees.discard(file_path)
+                old_tree = self._trees.get(file_path)
+            if old_tree is not None:
+                tree = parser.parse(source_code, old_tree)
+            else:
+                tree = parser.parse(source_code)
+            self._remember_tree(file_path, tree)
+            
+            file_node_id = self._create_file_node(self.current_file)
+            
+            # Generate module name for indexing
+            module_name = os.path.splitext(os.path.basename(file_path))[0]
+            if build_index:
+                if module_name not in self.module_definitions:
+                    self.module_definitions[module_name] = {}
+                # Associate module name with file node
+                self.module_to_file[module_name] = file_node_id
+            
+            # Parse the syntax tree
+            self._parse_tree(tree.root_node, source_code, build_index, module_name)
 
             return self.nodes, self.relations
         except Exception as e:
@@ -118,6 +306,96 @@ class TypeScriptParser:
             print(f"Error parsing file {file_path}: {e}")
             return {}, []
 
+    def apply_edit(self, file_path: str, edit: Dict[str, Any]) -> bool:
+        """Record an edit to a file whose syntax tree this parser still holds.
+        
+        The next parse_file call for the file re-parses it incrementally.
+        
+        Args:
+            file_path: Path of the edited file
+            edit: Keyword arguments of tree_sitter.Tree.edit (start_byte,
+                old_end_byte, new_end_byte, start_point, old_end_point,
+                new_end_point)
+            
+        Returns:
+            True if the edit was applied, False if no tree is held for the file
+        """
+        tree = self._trees.get(file_path)
+        if tree is None:
+            return False
+        tree.edit(**edit)
+        self._edited_trees.add(file_path)
+        return True
+
+    def _remember_tree(self, file_path: str, tree: Tree) -> None:
+        """Keep the latest tree of a file, evicting the least recently parsed ones."""
+        self._trees[file_path] = tree
+        self._trees.move_to_end(file_path)
+        while len(self._trees) > _TREE_CACHE_SIZE:
+            evicted, _ = self._trees.popitem(last=False)
+            self._edited_trees.discard(evicted)
+
+    def _parse_file_cached(
+        self, file_path: str, source: Optional[bytes] = None
+    ) -> Tuple[Dict[str, CodeNode], List[CodeRelation]]:
+        """Parse a file with build_index=True, reusing the shared parse cache."""
+        from src.ast_parser.parse_cache import get_parse_cache
+
+        cache = get_parse_cache(self.cache_path)
+        stamp = cache.stamp(file_path)
+        # An edited file is re-parsed incrementally from its old tree; its
+        # cache entry, if any, describes the content before the edit
+        result = None if file_path in self._edited_trees else cache.get(file_path, stamp)
+        if result is None:
+            if source is None:
+                source = _read_source(file_path)
+            digest = None if source is None else content_digest(source)
+            result = self._parse_file_isolated(file_path, source)
+            cache.put(file_path, stamp, result, digest)
+        self._merge_file_result(result)
+        return self.nodes, self.relations
+
+    def _parse_file_isolated(self, file_path: str, source: Optional[bytes]) -> Tuple[Any, ...]:
+        """Parse one file with this parser and return only that file's output.
+        
+        The collected state is set aside for the parse, so the export holds
+        this file alone while the tree-sitter parsers and held trees are reused.
+        """
+        collected = (self.nodes, self.relations, self.module_definitions, self.pending_imports, self.module_to_file)
+        cache_path = self.cache_path
+        self.nodes, self.relations, self.module_definitions, self.pending_imports, self.module_to_file = {}, [], {}, [], {}
+        self.cache_path = None
+        try:
+            self.parse_file(file_path, build_index=True, source=source)
+            return self._export_file_result()
+        finally:
+            self.nodes, self.relations, self.module_definitions, self.pending_imports, self.module_to_file = collected
+            self.cache_path = cache_path
+
+    def _export_file_result(self) -> Tuple[Any, ...]:
+        """Return the state collected by this parser in a picklable form."""
+        return (
+            self.nodes,
+            self.relations,
+            self.module_definitions,
+            self.pending_imports,
+            self.module_to_file,
+        )
+
+    def _merge_file_result(self, result: Tuple[Any, ...]) -> None:
+        """Merge the output of a single-file parse into this parser.
+        
+        Args:
+            result: State exported by _export_file_result
+        """
+        nodes, relations, module_definitions, pending_imports, module_to_file = result
+        self.nodes.update(nodes)
+        self.relations.extend(relations)
+        for module_name, definitions in module_definitions.items():
+            self.module_definitions.setdefault(module_name, {}).update(definitions)
+        self.pending_imports.extend(pending_imports)
+        self.module_to_file.update(module_to_file)
+
     def _get_parser_for_file(self, file_path: str) -> Parser:
         """Select the appropriate parser based on file extension.
         
@@ -127,13 +405,8 @@ class TypeScriptParser:
         Returns:
             Tree-sitter parser instance
         """
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext == '.ts':
-            return self.ts_parser
-        elif ext in ['.tsx']:
-            return self.tsx_parser
-        else:  # .js, .jsx
-            return self.js_parser
+        ext = file_path.rpartition(".")[2].lower()
+        return self._parser_by_ext.get(ext, self.js_parser)
 
     def _create_file_node(self, file_path: str) -> str:
         """Create a file node.
@@ -145,7 +418,7 @@ class TypeScriptParser:
             Node ID of the created file node
         """
         file_name = os.path.basename(file_path)
-        node_id = f"file:{file_path}"
+        node_id = self.current_file_node_id if file_path is self.current_file else f"file:{file_path}"
         self.nodes[node_id] = CodeNode(
             node_id=node_id,
             node_type="File",
@@ -167,68 +440,74 @@ class TypeScriptParser:
         Returns:
             Unique node ID
         """
+        if file_path is self.current_file:
+            # Reuse the "<type>:<file>:" prefix built once per file and node type
+            prefix = self._id_prefixes.get(node_type)
+            if prefix is None:
+                prefix = self._id_prefixes[node_type] = f"{node_type}:{file_path}:"
+            return f"{prefix}{name}:{line_no}"
         return f"{node_type}:{file_path}:{name}:{line_no}"
 
-    def _parse_tree(self, root_node: Node, source_code: str, build_index: bool = False, module_name: str = "") -> None:
+    def _parse_tree(self, root_node: Node, source_code: bytes, build_index: bool = False, module_name: str = "") -> None:
         """Parse the tree-sitter syntax tree.
         
         Args:
             root_node: Root node of the syntax tree
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
             build_index: Whether to build module definition index
             module_name: Name of the module
         """
-        # Determine which language to use for queries
-        language = self._get_query_language()
+        # Match every extraction pattern in one pass over the tree
+        query = _get_query(self._get_query_language(), _EXTRACTION_QUERY)
+        captures = QueryCursor(query).captures(root_node)
+        
+        # Class and scope spans answer the nesting checks of the extractors
+        self._class_spans = _SpanSet(captures.get("class", []))
+        self._scope_spans = _SpanSet(captures.get("scope", []))
         
         # Extract functions (including arrow functions)
-        self._extract_functions(root_node, source_code, build_index, module_name, language)
+        self._extract_functions(captures, source_code, build_index, module_name)
         
         # Extract classes
-        self._extract_classes(root_node, source_code, build_index, module_name, language)
+        self._extract_classes(captures, source_code, build_index, module_name)
         
         # Extract top-level variables
-        self._extract_variables(root_node, source_code, language)
+        self._extract_variables(captures, source_code)
         
         # Extract imports
-        self._extract_imports(root_node, source_code, language)
+        self._extract_imports(captures, source_code)
         
         # Extract exports
-        self._extract_exports(root_node, source_code, language)
+        self._extract_exports(captures, source_code)
 
-    def _extract_functions(self, root_node: Node, source_code: str, build_index: bool = False, module_name: str = "", language: Language = None) -> None:
-        """Extract function declarations from the syntax tree.
+    def _extract_functions(self, captures: Dict[str, List[Node]], source_code: bytes, build_index: bool = False, module_name: str = "") -> None:
+        """Extract function declarations from the extraction query captures.
         
         Args:
-            root_node: Root node of the syntax tree
-            source_code: Source code of the file
+            captures: Captures of the extraction query, keyed by capture name
+            source_code: Source code of the file, as UTF-8 bytes
             build_index: Whether to build module definition index
             module_name: Name of the module
-            language: Tree-sitter language object for queries
         """
-        if language is None:
-            language = self.js_language
-            
         # Extract standard function declarations
         try:
-            query_str = "(function_declaration name: (identifier) @name) @function"
-            query = Query(language, query_str)
-            cursor = QueryCursor(query)
-            capture_dict = cursor.captures(root_node)
-            
-            if "function" in capture_dict and "name" in capture_dict:
+            if "function" in captures and "function.name" in captures:
+                # The name is a direct child of its function declaration
+                name_by_function = {}
+                for name_node in captures["function.name"]:
+                    name_by_function.setdefault(name_node.parent.id, name_node)
+                
                 # Match functions with their names
-                for func_node in capture_dict["function"]:
+                for func_node in captures["function"]:
                     # Skip if inside a class
                     if self._is_inside_class(func_node):
                         continue
                     
                     # Find the corresponding name
                     func_name = None
-                    for name_node in capture_dict["name"]:
-                        if name_node.parent == func_node or func_node == name_node.parent.parent:
-                            func_name = self._get_node_text(name_node, source_code)
-                            break
+                    name_node = name_by_function.get(func_node.id)
+                    if name_node is not None:
+                        func_name = self._get_node_text(name_node, source_code)
                     
                     if func_name:
                         line_no = func_node.start_point[0] + 1
@@ -248,7 +527,7 @@ class TypeScriptParser:
                             properties={
                                 "is_method": False,
                                 "parameters": params,
-                                "language": self._get_language_from_file(),
+                                "language": self.current_language,
                                 "function_style": "standard",
                                 "is_async": is_async,
                             },
@@ -256,10 +535,9 @@ class TypeScriptParser:
                         
                         self.nodes[node_id].code_snippet = self._get_node_text(func_node, source_code)
                         
-                        file_node_id = f"file:{self.current_file}"
                         self.relations.append(
                             CodeRelation(
-                                source_id=file_node_id,
+                                source_id=self.current_file_node_id,
                                 target_id=node_id,
                                 relation_type="CONTAINS",
                             )
@@ -272,15 +550,10 @@ class TypeScriptParser:
         
         # Extract arrow functions
         try:
-            query_str = "(lexical_declaration (variable_declarator name: (identifier) @name value: (arrow_function) @arrow))"
-            query = Query(language, query_str)
-            cursor = QueryCursor(query)
-            capture_dict = cursor.captures(root_node)
-            
-            if "arrow" in capture_dict and "name" in capture_dict:
+            if "arrow" in captures and "arrow.name" in captures:
                 # Match arrow functions with their names
-                arrow_nodes = capture_dict["arrow"]
-                name_nodes = capture_dict["name"]
+                arrow_nodes = captures["arrow"]
+                name_nodes = captures["arrow.name"]
                 
                 for i, arrow_node in enumerate(arrow_nodes):
                     # Skip if inside a class
@@ -309,7 +582,7 @@ class TypeScriptParser:
                             properties={
                                 "is_method": False,
                                 "parameters": params,
-                                "language": self._get_language_from_file(),
+                                "language": self.current_language,
                                 "function_style": "arrow",
                                 "is_async": is_async,
                             },
@@ -317,10 +590,9 @@ class TypeScriptParser:
                         
                         self.nodes[node_id].code_snippet = self._get_node_text(arrow_node, source_code)
                         
-                        file_node_id = f"file:{self.current_file}"
                         self.relations.append(
                             CodeRelation(
-                                source_id=file_node_id,
+                                source_id=self.current_file_node_id,
                                 target_id=node_id,
                                 relation_type="CONTAINS",
                             )
@@ -331,39 +603,28 @@ class TypeScriptParser:
         except Exception as e:
             logger.warning(f"Error extracting arrow functions: {e}")
 
-    def _extract_classes(self, root_node: Node, source_code: str, build_index: bool = False, module_name: str = "", language: Language = None) -> None:
-        """Extract class declarations from the syntax tree.
+    def _extract_classes(self, captures: Dict[str, List[Node]], source_code: bytes, build_index: bool = False, module_name: str = "") -> None:
+        """Extract class declarations from the extraction query captures.
         
         Args:
-            root_node: Root node of the syntax tree
-            source_code: Source code of the file
+            captures: Captures of the extraction query, keyed by capture name
+            source_code: Source code of the file, as UTF-8 bytes
             build_index: Whether to build module definition index
             module_name: Name of the module
-            language: Tree-sitter language object for queries
         """
-        if language is None:
-            language = self.js_language
-            
-        # Use simpler query and extract name manually to support both JS and TS
-        query_str = "(class_declaration) @class"
-        
+        # The class pattern is kept simple and the name extracted manually to
+        # support both JS and TS
         try:
-            query = Query(language, query_str)
-            cursor = QueryCursor(query)
-            capture_dict = cursor.captures(root_node)
-            
-            processed_classes = set()
-            
-            for node in capture_dict.get("class", []):
+            # Each class declaration is captured once, so classes sharing a
+            # name are all kept, told apart by their line in the node id
+            for node in captures.get("class", []):
                 # Find the class name - can be identifier (JS) or type_identifier (TS)
                 class_name = None
-                for child in node.children:
-                    if child.type in ["identifier", "type_identifier"]:
-                        class_name = self._get_node_text(child, source_code)
-                        break
+                name_node = node.child_by_field_name("name")
+                if name_node is not None and name_node.type in ("identifier", "type_identifier"):
+                    class_name = self._get_node_text(name_node, source_code)
                 
-                if class_name and class_name not in processed_classes:
-                        processed_classes.add(class_name)
+                if class_name:
                         line_no = node.start_point[0] + 1
                         end_line_no = node.end_point[0] + 1
                         
@@ -378,7 +639,7 @@ class TypeScriptParser:
                             line_no=line_no,
                             end_line_no=end_line_no,
                             properties={
-                                "language": self._get_language_from_file(),
+                                "language": self.current_language,
                             },
                         )
                         
@@ -386,10 +647,9 @@ class TypeScriptParser:
                         self.nodes[node_id].code_snippet = self._get_node_text(node, source_code)
                         
                         # Create relationship: file contains class
-                        file_node_id = f"file:{self.current_file}"
                         self.relations.append(
                             CodeRelation(
-                                source_id=file_node_id,
+                                source_id=self.current_file_node_id,
                                 target_id=node_id,
                                 relation_type="CONTAINS",
                             )
@@ -408,13 +668,13 @@ class TypeScriptParser:
         except Exception as e:
             logger.warning(f"Error extracting classes: {e}")
 
-    def _extract_class_inheritance(self, class_node: Node, class_node_id: str, source_code: str) -> None:
+    def _extract_class_inheritance(self, class_node: Node, class_node_id: str, source_code: bytes) -> None:
         """Extract class inheritance relationships.
         
         Args:
             class_node: Tree-sitter node representing the class
             class_node_id: Node ID of the class
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
         """
         try:
             # Look for class_heritage (extends clause)
@@ -426,13 +686,13 @@ class TypeScriptParser:
                             parent_name = self._get_node_text(heritage_child, source_code)
                             
                             # Check if parent is imported
-                            if parent_name in self.imports:
+                            import_parts = self._import_parts.get(parent_name)
+                            if import_parts is not None:
                                 self.pending_imports.append({
                                     "type": "EXTENDS",
                                     "source_id": class_node_id,
-                                    "imported_module": self.imports[parent_name].split(".")[0],
-                                    "imported_name": self.imports[parent_name].split(".")[-1] 
-                                        if "." in self.imports[parent_name] else self.imports[parent_name],
+                                    "imported_module": import_parts[0],
+                                    "imported_name": import_parts[1],
                                     "original_name": parent_name
                                 })
                             else:
@@ -448,235 +708,199 @@ class TypeScriptParser:
         except Exception as e:
             logger.warning(f"Error extracting class inheritance: {e}")
 
-    def _extract_class_methods(self, class_node: Node, class_node_id: str, class_name: str, source_code: str) -> None:
+    def _extract_class_methods(self, class_node: Node, class_node_id: str, class_name: str, source_code: bytes) -> None:
         """Extract methods from a class.
         
         Args:
             class_node: Tree-sitter node representing the class
             class_node_id: Node ID of the class
             class_name: Name of the class
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
         """
         try:
-            # Look for class_body
-            for child in class_node.children:
-                if child.type == "class_body":
-                    # Extract method definitions
-                    for method_node in child.children:
-                        if method_node.type == "method_definition":
-                            # Get method name
-                            method_name = None
-                            is_async = False
-                            
-                            for method_child in method_node.children:
-                                if method_child.type == "property_identifier":
-                                    method_name = self._get_node_text(method_child, source_code)
-                                elif method_child.type == "async":
-                                    is_async = True
-                            
-                            if method_name:
-                                line_no = method_node.start_point[0] + 1
-                                end_line_no = method_node.end_point[0] + 1
+            body = class_node.child_by_field_name("body")
+            if body is not None:
+                # Extract method definitions
+                for method_node in body.named_children:
+                    if method_node.type == "method_definition":
+                        # Get method name; computed and private names are skipped
+                        method_name = None
+                        name_node = method_node.child_by_field_name("name")
+                        if name_node is not None and name_node.type == "property_identifier":
+                            method_name = self._get_node_text(name_node, source_code)
+                        
+                        # The async keyword is an anonymous child, not a field
+                        is_async = False
+                        for method_child in method_node.children:
+                            if method_child.type == "async":
+                                is_async = True
+                                break
+                    
+                        if method_name:
+                            line_no = method_node.start_point[0] + 1
+                            end_line_no = method_node.end_point[0] + 1
+                        
+                            node_id = self._get_node_id("Method", method_name, self.current_file, line_no)
+                        
+                            # Extract parameters
+                            params = self._extract_function_params(method_node, source_code)
+                        
+                            # Create method node
+                            self.nodes[node_id] = CodeNode(
+                                node_id=node_id,
+                                node_type="Method",
+                                name=method_name,
+                                file_path=self.current_file,
+                                line_no=line_no,
+                                end_line_no=end_line_no,
+                                properties={
+                                    "is_method": True,
+                                    "parent_class": class_name,
+                                    "parameters": params,
+                                    "language": self.current_language,
+                                    "is_async": is_async,
+                                },
+                            )
+                        
+                            # Add code snippet
+                            self.nodes[node_id].code_snippet = self._get_node_text(method_node, source_code)
+                        
+                            # Create relationship: class defines method
+                            self.relations.append(
+                                CodeRelation(
+                                    source_id=class_node_id,
+                                    target_id=node_id,
+                                    relation_type="DEFINES",
+                                )
+                            )
+        except Exception as e:
+            logger.warning(f"Error extracting class methods: {e}")
+
+    def _extract_variables(self, captures: Dict[str, List[Node]], source_code: bytes) -> None:
+        """Extract top-level variable declarations from the extraction query captures.
+        
+        Args:
+            captures: Captures of the extraction query, keyed by capture name
+            source_code: Source code of the file, as UTF-8 bytes
+        """
+        # Start bytes of the declarations already handled; a declaration with
+        # several declarators is captured once per declarator
+        seen_declarations = set()
+        
+        # Declarations with an arrow function value are handled as functions
+        arrow_declarations = {
+            declarator.parent.id for declarator in captures.get("arrow.declarator", [])
+        }
+        
+        # Process both lexical declarations (const, let) and variable
+        # declarations (var)
+        for declaration_capture, name_capture in _VARIABLE_CAPTURES:
+            try:
+                # Names sit in a variable_declarator directly under their
+                # declaration; the first declarator names the declaration
+                name_by_declaration = {}
+                for name_node in captures.get(name_capture, []):
+                    name_by_declaration.setdefault(name_node.parent.parent.id, name_node)
+                
+                for node in captures.get(declaration_capture, []):
+                    # Check if this is a top-level declaration (not inside function/class)
+                    if self._is_top_level(node):
+                        # Find the variable name
+                        var_name = None
+                        name_node = name_by_declaration.get(node.id)
+                        if name_node is not None:
+                            var_name = self._get_node_text(name_node, source_code)
+                        
+                        if var_name and node.start_byte not in seen_declarations:
+                            # Skip arrow functions (already handled)
+                            if node.id not in arrow_declarations:
+                                seen_declarations.add(node.start_byte)
+                                line_no = node.start_point[0] + 1
                                 
-                                node_id = self._get_node_id("Method", method_name, self.current_file, line_no)
+                                # Determine declaration type (const, let, var)
+                                decl_type = "let"
+                                for child in node.children:
+                                    if child.type in ["const", "let", "var"]:
+                                        decl_type = child.type
+                                        break
                                 
-                                # Extract parameters
-                                params = self._extract_function_params(method_node, source_code)
+                                node_id = self._get_node_id("Variable", var_name, self.current_file, line_no)
                                 
-                                # Create method node
+                                # Create variable node
                                 self.nodes[node_id] = CodeNode(
                                     node_id=node_id,
-                                    node_type="Method",
-                                    name=method_name,
+                                    node_type="Variable",
+                                    name=var_name,
                                     file_path=self.current_file,
                                     line_no=line_no,
-                                    end_line_no=end_line_no,
                                     properties={
-                                        "is_method": True,
-                                        "parent_class": class_name,
-                                        "parameters": params,
-                                        "language": self._get_language_from_file(),
-                                        "is_async": is_async,
+                                        "declaration_type": decl_type,
+                                        "language": self.current_language,
                                     },
                                 )
                                 
-                                # Add code snippet
-                                self.nodes[node_id].code_snippet = self._get_node_text(method_node, source_code)
-                                
-                                # Create relationship: class defines method
+                                # Create relationship: file contains variable
                                 self.relations.append(
                                     CodeRelation(
-                                        source_id=class_node_id,
+                                        source_id=self.current_file_node_id,
                                         target_id=node_id,
-                                        relation_type="DEFINES",
+                                        relation_type="CONTAINS",
                                     )
                                 )
-        except Exception as e:
-            logger.warning(f"Error extracting class methods: {e}")
-
-    def _extract_variables(self, root_node: Node, source_code: str, language: Language = None) -> None:
-        """Extract top-level variable declarations from the syntax tree.
-        
-        Args:
-            root_node: Root node of the syntax tree
-            source_code: Source code of the file
-            language: Tree-sitter language object for queries
-        """
-        if language is None:
-            language = self.js_language
-        
-        processed_vars = set()
-        
-        # Query for lexical declarations (const, let)
-        query_str_lexical = """
-        (lexical_declaration
-          (variable_declarator
-            name: (identifier) @name)) @declaration
-        """
-        
-        # Query for variable declarations (var)
-        query_str_var = """
-        (variable_declaration
-          (variable_declarator
-            name: (identifier) @name)) @declaration
-        """
-        
-        # Process both types of declarations
-        for query_str in [query_str_lexical, query_str_var]:
-            try:
-                query = Query(language, query_str)
-                cursor = QueryCursor(query)
-                capture_dict = cursor.captures(root_node)
-                captures = []
-                for capture_name, nodes in capture_dict.items():
-                    for node in nodes:
-                        captures.append((node, capture_name))
-                
-                for node, capture_name in captures:
-                    if capture_name == "declaration":
-                        # Check if this is a top-level declaration (not inside function/class)
-                        if self._is_top_level(node):
-                            # Find the variable name
-                            var_name = None
-                            for child_node, child_capture in captures:
-                                if child_capture == "name" and self._is_ancestor(node, child_node):
-                                    var_name = self._get_node_text(child_node, source_code)
-                                    break
-                            
-                            if var_name and var_name not in processed_vars:
-                                # Check if this is an arrow function (already handled)
-                                is_function = False
-                                for child in node.children:
-                                    if child.type == "variable_declarator":
-                                        for decl_child in child.children:
-                                            if "arrow_function" in decl_child.type:
-                                                is_function = True
-                                                break
                                 
-                                if not is_function:
-                                    processed_vars.add(var_name)
-                                    line_no = node.start_point[0] + 1
-                                    
-                                    # Determine declaration type (const, let, var)
-                                    decl_type = "let"
-                                    for child in node.children:
-                                        if child.type in ["const", "let", "var"]:
-                                            decl_type = child.type
-                                            break
-                                    
-                                    node_id = self._get_node_id("Variable", var_name, self.current_file, line_no)
-                                    
-                                    # Create variable node
-                                    self.nodes[node_id] = CodeNode(
-                                        node_id=node_id,
-                                        node_type="Variable",
-                                        name=var_name,
-                                        file_path=self.current_file,
-                                        line_no=line_no,
-                                        properties={
-                                            "declaration_type": decl_type,
-                                            "language": self._get_language_from_file(),
-                                        },
-                                    )
-                                    
-                                    # Create relationship: file contains variable
-                                    file_node_id = f"file:{self.current_file}"
-                                    self.relations.append(
-                                        CodeRelation(
-                                            source_id=file_node_id,
-                                            target_id=node_id,
-                                            relation_type="CONTAINS",
-                                        )
-                                    )
-                                    
             except Exception as e:
                 logger.warning(f"Error extracting variables: {e}")
 
-    def _extract_imports(self, root_node: Node, source_code: str, language: Language = None) -> None:
-        """Extract import statements from the syntax tree.
+    def _extract_imports(self, captures: Dict[str, List[Node]], source_code: bytes) -> None:
+        """Extract import statements from the extraction query captures.
         
         Args:
-            root_node: Root node of the syntax tree
-            source_code: Source code of the file
-            language: Tree-sitter language object for queries
+            captures: Captures of the extraction query, keyed by capture name
+            source_code: Source code of the file, as UTF-8 bytes
         """
-        if language is None:
-            language = self.js_language
-            
-        # Query for import statements
-        query_str = "(import_statement) @import"
-        
         try:
-            query = Query(language, query_str)
-            cursor = QueryCursor(query)
-            capture_dict = cursor.captures(root_node)
-            captures = []
-            for capture_name, nodes in capture_dict.items():
-                for node in nodes:
-                    captures.append((node, capture_name))
-            
-            file_node_id = f"file:{self.current_file}"
             
-            for node, capture_name in captures:
-                if capture_name == "import":
-                    # Extract source module
-                    source_module = None
-                    imported_names = []
+            for node in captures.get("import", []):
+                # Extract source module
+                source_module = None
+                imported_names = []
+                
+                for child in node.children:
+                    if child.type == "string":
+                        # Remove quotes from string
+                        source_module = self._get_node_text(child, source_code).strip('"\'')
+                    elif child.type == "import_clause":
+                        # Extract imported names
+                        imported_names = self._extract_import_names(child, source_code)
+                
+                if source_module:
+                    # Add to imports mapping
+                    import_parts = (source_module.partition(".")[0], source_module.rpartition(".")[2])
+                    for name in imported_names:
+                        self.imports[name] = source_module
+                        self._import_parts[name] = import_parts
                     
-                    for child in node.children:
-                        if child.type == "string":
-                            # Remove quotes from string
-                            source_module = self._get_node_text(child, source_code).strip('"\'')
-                        elif child.type == "import_clause":
-                            # Extract imported names
-                            imported_names = self._extract_import_names(child, source_code)
+                    # Add to pending imports for later resolution
+                    root_module = source_module.split('/')[0] if '/' in source_module else source_module
                     
-                    if source_module:
-                        # Add to imports mapping
-                        for name in imported_names:
-                            self.imports[name] = source_module
-                        
-                        # Add to pending imports for later resolution
-                        root_module = source_module.split('/')[0] if '/' in source_module else source_module
+                    for name in imported_names:
+                        self.pending_imports.append({
+                            "type": "IMPORTS",
+                            "source_id": self.current_file_node_id,
+                            "imported_module": root_module,
+                            "imported_name": name,
+                            "original_name": name,
+                        })
                         
-                        for name in imported_names:
-                            self.pending_imports.append({
-                                "type": "IMPORTS",
-                                "source_id": file_node_id,
-                                "imported_module": root_module,
-                                "imported_name": name,
-                                "original_name": name,
-                            })
-                            
         except Exception as e:
             logger.warning(f"Error extracting imports: {e}")
 
-    def _extract_import_names(self, import_clause: Node, source_code: str) -> List[str]:
+    def _extract_import_names(self, import_clause: Node, source_code: bytes) -> List[str]:
         """Extract names from an import clause.
         
         Args:
             import_clause: Tree-sitter node representing the import clause
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
             
         Returns:
             List of imported names
@@ -705,64 +929,48 @@ class TypeScriptParser:
         
         return names
 
-    def _extract_exports(self, root_node: Node, source_code: str, language: Language = None) -> None:
-        """Extract export statements from the syntax tree.
+    def _extract_exports(self, captures: Dict[str, List[Node]], source_code: bytes) -> None:
+        """Extract export statements from the extraction query captures.
         
         Args:
-            root_node: Root node of the syntax tree
-            source_code: Source code of the file
-            language: Tree-sitter language object for queries
+            captures: Captures of the extraction query, keyed by capture name
+            source_code: Source code of the file, as UTF-8 bytes
         """
-        if language is None:
-            language = self.js_language
-            
-        # Query for export statements
-        query_str = "(export_statement) @export"
-        
         try:
-            query = Query(language, query_str)
-            cursor = QueryCursor(query)
-            capture_dict = cursor.captures(root_node)
-            captures = []
-            for capture_name, nodes in capture_dict.items():
-                for node in nodes:
-                    captures.append((node, capture_name))
-            
-            for node, capture_name in captures:
-                if capture_name == "export":
-                    # Mark exported entities
-                    for child in node.children:
-                        if child.type in ["function_declaration", "class_declaration", "lexical_declaration"]:
-                            # Find the name of the exported entity
-                            entity_name = self._extract_entity_name(child, source_code)
-                            if entity_name:
-                                # Find the corresponding node and mark as exported
-                                for node_id, code_node in self.nodes.items():
-                                    if code_node.name == entity_name and code_node.file_path == self.current_file:
-                                        code_node.properties["exported"] = True
-                                        code_node.properties["export_type"] = "named"
-                        elif child.type == "export_clause":
-                            # Named exports without declaration
-                            for export_child in child.children:
-                                if export_child.type == "export_specifier":
-                                    for spec_child in export_child.children:
-                                        if spec_child.type == "identifier":
-                                            entity_name = self._get_node_text(spec_child, source_code)
-                                            # Mark as exported
-                                            for node_id, code_node in self.nodes.items():
-                                                if code_node.name == entity_name and code_node.file_path == self.current_file:
-                                                    code_node.properties["exported"] = True
-                                                    code_node.properties["export_type"] = "named"
-                                            
+            for node in captures.get("export", []):
+                # Mark exported entities
+                for child in node.children:
+                    if child.type in ["function_declaration", "class_declaration", "lexical_declaration"]:
+                        # Find the name of the exported entity
+                        entity_name = self._extract_entity_name(child, source_code)
+                        if entity_name:
+                            # Find the corresponding node and mark as exported
+                            for node_id, code_node in self.nodes.items():
+                                if code_node.name == entity_name and code_node.file_path == self.current_file:
+                                    code_node.properties["exported"] = True
+                                    code_node.properties["export_type"] = "named"
+                    elif child.type == "export_clause":
+                        # Named exports without declaration
+                        for export_child in child.children:
+                            if export_child.type == "export_specifier":
+                                for spec_child in export_child.children:
+                                    if spec_child.type == "identifier":
+                                        entity_name = self._get_node_text(spec_child, source_code)
+                                        # Mark as exported
+                                        for node_id, code_node in self.nodes.items():
+                                            if code_node.name == entity_name and code_node.file_path == self.current_file:
+                                                code_node.properties["exported"] = True
+                                                code_node.properties["export_type"] = "named"
+                                        
         except Exception as e:
             logger.warning(f"Error extracting exports: {e}")
 
-    def _extract_entity_name(self, node: Node, source_code: str) -> Optional[str]:
+    def _extract_entity_name(self, node: Node, source_code: bytes) -> Optional[str]:
         """Extract the name of an entity (function, class, variable).
         
         Args:
             node: Tree-sitter node representing the entity
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
             
         Returns:
             Name of the entity, or None if not found
@@ -780,12 +988,12 @@ class TypeScriptParser:
         
         return None
 
-    def _extract_function_params(self, func_node: Node, source_code: str) -> List[str]:
+    def _extract_function_params(self, func_node: Node, source_code: bytes) -> List[str]:
         """Extract parameters from a function node.
         
         Args:
             func_node: Tree-sitter node representing the function
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
             
         Returns:
             List of parameter names
@@ -835,12 +1043,7 @@ class TypeScriptParser:
         Returns:
             True if the node is inside a class, False otherwise
         """
-        current = node.parent
-        while current:
-            if current.type == "class_declaration":
-                return True
-            current = current.parent
-        return False
+        return self._class_spans.encloses(node)
 
     def _is_top_level(self, node: Node) -> bool:
         """Check if a node is at the top level (not inside a function or class).
@@ -851,41 +1054,20 @@ class TypeScriptParser:
         Returns:
             True if the node is at the top level, False otherwise
         """
-        current = node.parent
-        while current:
-            if current.type in ["function_declaration", "arrow_function", "class_declaration", "method_definition"]:
-                return False
-            current = current.parent
-        return True
+        return not self._scope_spans.encloses(node)
 
-    def _is_ancestor(self, ancestor: Node, descendant: Node) -> bool:
-        """Check if one node is an ancestor of another.
-        
-        Args:
-            ancestor: Potential ancestor node
-            descendant: Potential descendant node
-            
-        Returns:
-            True if ancestor is an ancestor of descendant, False otherwise
-        """
-        current = descendant.parent
-        while current:
-            if current == ancestor:
-                return True
-            current = current.parent
-        return False
-
-    def _get_node_text(self, node: Node, source_code: str) -> str:
+    def _get_node_text(self, node: Node, source_code: bytes) -> str:
         """Get the text content of a tree-sitter node.
         
         Args:
             node: Tree-sitter node
-            source_code: Source code of the file
+            source_code: Source code of the file, as UTF-8 bytes
             
         Returns:
             Text content of the node
         """
-        return source_code[node.start_byte:node.end_byte]
+        # Node offsets are byte offsets, so they index the encoded source
+        return source_code[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
 
     def _get_language_from_file(self) -> str:
         """Determine the language from the current file extension.
@@ -893,15 +1075,8 @@ class TypeScriptParser:
         Returns:
             Language name (javascript, typescript, jsx, tsx)
         """
-        ext = os.path.splitext(self.current_file)[1].lower()
-        if ext == '.ts':
-            return 'typescript'
-        elif ext == '.tsx':
-            return 'tsx'
-        elif ext == '.jsx':
-            return 'jsx'
-        else:
-            return 'javascript'
+        ext = self.current_file.rpartition(".")[2].lower()
+        return _LANGUAGE_BY_EXTENSION.get(ext, "javascript")
 
     def _get_query_language(self) -> Language:
         """Get the tree-sitter language object for queries based on current file.
@@ -909,14 +1084,8 @@ class TypeScriptParser:
         Returns:
             Tree-sitter Language object for the current file's language
         """
-        ext = os.path.splitext(self.current_file)[1].lower()
-        if ext == '.ts':
-            return self.ts_language
-        elif ext == '.tsx':
-            return self.tsx_language
-        else:
-            # Use JS language for .js and .jsx
-            return self.js_language
+        ext = self.current_file.rpartition(".")[2].lower()
+        return self._language_by_ext.get(ext, self.js_language)
 
     def _process_pending_imports(self) -> None:
         """Process pending import relationships.
@@ -932,10 +1101,10 @@ class TypeScriptParser:
                 imported_name = import_info["imported_name"]
                 
                 # Look up the target node in module definitions
-                if imported_module in self.module_definitions:
-                    if imported_name in self.module_definitions[imported_module]:
-                        target_id = self.module_definitions[imported_module][imported_name]
-                        
+                definitions = self.module_definitions.get(imported_module)
+                if definitions is not None:
+                    target_id = definitions.get(imported_name)
+                    if target_id is not None:
                         # Create the relationship
                         relation_key = f"{source_id}:{import_type}:{target_id}"
                         if relation_key not in self.established_relations:
@@ -964,3 +1133,58 @@ class TypeScriptParser:
                                 self.established_relations.add(relation_key)
             except Exception as e:
                 logger.warning(f"Error processing pending import: {e}")
+
+
+def _iter_source_files(directory_path: str) -> Iterator[str]:
+    """Yield the JS/TS files under directory_path in os.walk order.
+
+    Uses os.scandir so the file/directory checks come from the cached
+    DirEntry data, and never descends into dependency or VCS directories
+    such as node_modules. Like os.walk, symlinked directories are not
+    followed and unreadable directories are skipped.
+    """
+    stack = [directory_path]
+    while stack:
+        current = stack.pop()
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if entry.name not in _SKIPPED_DIRS and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    else:
+                        _, dot, ext = entry.name.rpartition(".")
+                        if dot and ext in _SOURCE_EXTENSIONS:
+                            files.append(entry.path)
+        except OSError:
+            continue
+
+        yield from files
+        # Reversed so subdirectories are popped, and walked, in listing order
+        subdirs.reverse()
+        stack.extend(subdirs)
+
+
+def _parse_file_worker(file_path: str, source: Optional[bytes] = None) -> Tuple[Any, ...]:
+    """Parse one file with a fresh parser; runs inside the processing pool."""
+    parser = TypeScriptParser()
+    # Caching happens in the caller, which owns the shared cache
+    parser.cache_path = None
+    parser.parse_file(file_path, build_index=True, source=source)
+    return parser._export_file_result()
+
+
+def _parse_cached_file_worker(
+    file_path: str, source: Optional[bytes] = None
+) -> Tuple[Tuple[Any, ...], Optional[str]]:
+    """Parse one file for the parse cache, also returning the digest of the bytes parsed."""
+    if source is None:
+        source = _read_source(file_path)
+    digest = None if source is None else content_digest(source)
+    return _parse_file_worker(file_path, source), digest
@@ -14,6 +14,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.ast_parser.parser import ASTParser
+from src.ast_parser.parse_cache import save_shared_caches
 from src.ast_parser.multi_parser import MultiLanguageParser
 from src.embeddings.factory import get_embedding_provider
 from src.embeddings.embedder import CodeEmbedder, OpenAIEmbeddings
@@ -192,6 +193,10 @@ class CodebaseKnowledgeGraph:
         
         logger.info(f"Total parsed {len(nodes)} nodes and {len(relations)} relationships")
         
+        # Persist the parse cache now: with --start-mcp-server the process runs
+        # until it is killed and never reaches the atexit hook
+        save_shared_caches()
+        
         # Generate embedding vectors for nodes
         logger.info("Generating embedding vectors for nodes...")
         self._generate_embeddings(nodes)
@@ -593,7 +598,7 @@ class CodebaseKnowledgeGraph:
                 if key != "embedding":  # Skip already processed embedding vectors
                     # Check property value type, ensure it's a Neo4j-supported primitive type or array thereof
                     if isinstance(value, (str, int, float, bool)) or (
-                        isinstance(value, list) and all(isinstance(item, (int, float)) for item in value)
+                        isinstance(value, list) and value and all(isinstance(item, (int, float)) for item in value)
                     ):
                         properties[key] = value
                     else:
@@ -631,7 +636,7 @@ class CodebaseKnowledgeGraph:
             for key, value in relation.properties.items():
                 # Check property value type, ensure it's a Neo4j-supported primitive type or array thereof
                 if isinstance(value, (str, int, float, bool)) or (
-                    isinstance(value, list) and all(isinstance(item, (int, float)) for item in value)
+                    isinstance(value, list) and value and all(isinstance(item, (int, float)) for item in value)
                 ):
                     processed_properties[key] = value
                 else:
@@ -259,34 +259,29 @@ class Neo4jDatabase:
             with self.driver.session(database=self.database) as session:
                 batch_size = 1000  # 設定適當的批次大小
                 
-                for i in range(0, len(nodes), batch_size):
-                    batch = nodes[i:i+batch_size]
-                    created = 0
+                # 依標籤分組，每組每批只執行一次 UNWIND 查詢，而非每個節點一次
+                # Group by labels so each batch is one UNWIND query instead of
+                # one round trip per node
+                nodes_by_labels: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+                for node in nodes:
+                    nodes_by_labels.setdefault(tuple(node['labels']), []).append(node['properties'])
+                
+                for labels, rows in nodes_by_labels.items():
+                    # 構建標籤字串，例如 `:Label1:Label2`
+                    labels_str = ''.join([f":{label}" for label in labels])
                     
-                    # 對每個節點單獨處理
-                    for node in batch:
-                        labels = node['labels']
-                        properties = node['properties']
-                        
-                        # 構建標籤字串，例如 `:Label1:Label2`
-                        labels_str = ''.join([f":{label}" for label in labels])
-                        
-                        # 構建屬性字串，例如 `{id: 'test1', name: 'Test 1'}`
-                        props_str = "{"
-                        props_str += ", ".join([f"{k}: ${k}" for k in properties.keys()])
-                        props_str += "}"
-                        
-                        # 創建節點查詢
-                        query = f"""
-                        CREATE (n{labels_str} {props_str})
-                        RETURN n
-                        """
-                        
-                        # 執行查詢
-                        session.run(query, properties)
-                        created += 1
+                    # 創建節點查詢
+                    query = f"""
+                    UNWIND $rows AS props
+                    CREATE (n{labels_str})
+                    SET n = props
+                    """
                     
-                    logger.info(f"已創建 {created} 個節點")
+                    for i in range(0, len(rows), batch_size):
+                        batch = rows[i:i+batch_size]
+                        # 執行查詢
+                        session.run(query, {"rows": batch}).consume()
+                        logger.info(f"已創建 {len(batch)} 個節點")
         except Exception as e:
             logger.error(f"批量創建節點時發生錯誤: {e}")
             raise
@@ -306,36 +301,31 @@ class Neo4jDatabase:
             with self.driver.session(database=self.database) as session:
                 batch_size = 1000  # 設定適當的批次大小
                 
-                for i in range(0, len(relationships), batch_size):
-                    batch = relationships[i:i+batch_size]
-                    processed = 0
-                    
-                    # 對每個關係單獨處理，避免生成動態Cypher查詢
-                    for rel in batch:
-                        start_id = rel['start_node_id']
-                        end_id = rel['end_node_id']
-                        rel_type = rel['type']
-                        properties = rel['properties'] or {}
-                        
-                        # 使用參數化查詢
-                        query = f"""
-                        MATCH (start:Base {{id: $start_id}})
-                        MATCH (end:Base {{id: $end_id}})
-                        CREATE (start)-[r:{rel_type}]->(end)
-                        SET r = $props
-                        RETURN r
-                        """
-                        
-                        params = {
-                            "start_id": start_id,
-                            "end_id": end_id,
-                            "props": properties
-                        }
-                        
-                        session.run(query, params)
-                        processed += 1
+                # 關係類型無法參數化，因此依類型分組，每組每批執行一次 UNWIND 查詢
+                # Relationship types cannot be parameters, so relations are
+                # grouped by type and each batch is one UNWIND query
+                rows_by_type: Dict[str, List[Dict[str, Any]]] = {}
+                for rel in relationships:
+                    rows_by_type.setdefault(rel['type'], []).append({
+                        "start_id": rel['start_node_id'],
+                        "end_id": rel['end_node_id'],
+                        "props": rel['properties'] or {},
+                    })
+                
+                for rel_type, rows in rows_by_type.items():
+                    # 使用參數化查詢
+                    query = f"""
+                    UNWIND $rows AS row
+                    MATCH (start:Base {{id: row.start_id}})
+                    MATCH (end:Base {{id: row.end_id}})
+                    CREATE (start)-[r:{rel_type}]->(end)
+                    SET r = row.props
+                    """
                     
-                    logger.info(f"已處理 {processed} 個關係")
+                    for i in range(0, len(rows), batch_size):
+                        batch = rows[i:i+batch_size]
+                        session.run(query, {"rows": batch}).consume()
+                        logger.info(f"已處理 {len(batch)} 個關係")
         except Exception as e:
             logger.error(f"批量創建關係時發生錯誤: {e}")
             raise
@@ -0,0 +1,44 @@
+"""Helpers shared by the Python and TypeScript/JavaScript parser tests."""
+
+import os
+from contextlib import contextmanager
+from unittest import mock
+
+
+def relation_keys(relations):
+    """Return the relations as sorted (source, type, target) tuples."""
+    return sorted((r.source_id, r.relation_type, r.target_id) for r in relations)
+
+
+@contextmanager
+def record_parsed_files(parser_module):
+    """Record the paths the parser module's _parse_file_worker is called with.
+
+    Args:
+        parser_module: Module whose _parse_file_worker is wrapped
+
+    Yields:
+        List the parsed file paths are appended to, in call order
+    """
+    parsed = []
+    worker = parser_module._parse_file_worker
+
+    def spy(file_path, *args):
+        parsed.append(file_path)
+        return worker(file_path, *args)
+
+    with mock.patch.object(parser_module, "_parse_file_worker", spy):
+        yield parsed
+
+
+def parse_sequential_and_parallel(parser_class, directory_path):
+    """Parse a directory once sequentially and once through the processing pool.
+
+    Returns:
+        Tuple of the sequential and the pooled (nodes, relations) results
+    """
+    with mock.patch.dict(os.environ, {"PARALLEL_INDEXING_ENABLED": "false"}):
+        sequential = parser_class().parse_directory(directory_path)
+    with mock.patch.dict(os.environ, {"PARALLEL_INDEXING_ENABLED": "true", "MIN_FILES_FOR_PARALLEL": "1"}):
+        pooled = parser_class().parse_directory(directory_path)
+    return sequential, pooled
@@ -4,7 +4,8 @@ import sys
 # 將專案根目錄加入 Python 路徑
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.ast_parser.parser import ASTParser
+from src.ast_parser.parser import ASTParser, CodeNode, CodeRelation
+from parser_helpers import parse_sequential_and_parallel, record_parsed_files, relation_keys
 
 def run_test():
     print("--- 開始測試 AST 解析器 ---")
@@ -65,5 +66,298 @@ def run_test():
 
     print("--- 結束測試 AST 解析器 ---")
 
+
+def _write_sample_package(root):
+    """Create a tiny multi-file package used by the parse_directory tests."""
+    (root / "models.py").write_text(
+        "class Base:\n"
+        "    def save(self):\n"
+        "        return True\n"
+    )
+    (root / "service.py").write_text(
+        "from models import Base\n"
+        "\n"
+        "class User(Base):\n"
+        "    def run(self):\n"
+        "        helper()\n"
+        "\n"
+        "def helper():\n"
+        "    Base.save(None)\n"
+    )
+    sub = root / "pkg"
+    sub.mkdir()
+    (sub / "tools.py").write_text("import models\n\nLIMIT = 3\n")
+
+
+def test_parse_directory_parallel_matches_sequential(tmp_path):
+    _write_sample_package(tmp_path)
+
+    (seq_nodes, seq_relations), (par_nodes, par_relations) = parse_sequential_and_parallel(ASTParser, str(tmp_path))
+
+    assert set(seq_nodes) == set(par_nodes)
+    assert relation_keys(seq_relations) == relation_keys(par_relations)
+    assert any(r.relation_type == "EXTENDS" for r in par_relations)
+    assert any(r.relation_type == "IMPORTS_DEFINITION" for r in par_relations)
+
+
+def test_parse_directory_cache_skips_unchanged_files(tmp_path, monkeypatch):
+    from src.ast_parser import parser as parser_module
+
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    _write_sample_package(src_dir)
+    cache_path = str(tmp_path / "cache.pkl")
+    monkeypatch.setenv("PARALLEL_INDEXING_ENABLED", "false")
+
+    first_nodes, first_relations = ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+    assert os.path.exists(cache_path)
+
+    with record_parsed_files(parser_module) as parsed:
+        nodes, relations = ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+        assert parsed == []
+        assert set(nodes) == set(first_nodes)
+        assert relation_keys(relations) == relation_keys(first_relations)
+
+        (src_dir / "models.py").write_text("class Base:\n    pass\n\nclass Extra:\n    pass\n")
+        nodes, _ = ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+        assert parsed == [str(src_dir / "models.py")]
+    assert any(node.name == "Extra" for node in nodes.values())
+
+
+def test_parse_function_args_with_positional_only_defaults(tmp_path):
+    source = tmp_path / "defaults.py"
+    source.write_text("def f(a=1, b=2, c=3, /, d=4):\n    pass\n\ndef g(x, y=1):\n    pass\n")
+
+    nodes, _ = ASTParser().parse_file(str(source))
+    args = {node.name: node.properties["args"] for node in nodes.values() if node.node_type == "Function"}
+
+    assert args["f"] == [{"name": "d", "has_default": True}]
+    assert args["g"] == [{"name": "x"}, {"name": "y", "has_default": True}]
+
+
+def test_parse_file_without_definitions_keeps_file_node(tmp_path):
+    source = tmp_path / "notes.py"
+    source.write_text('"""Only a docstring."""\nprint("hi")\n')
+
+    parser = ASTParser()
+    nodes, relations = parser.parse_file(str(source), build_index=True)
+
+    assert [node.node_type for node in nodes.values()] == ["File"]
+    assert relations == []
+    assert parser.module_to_file["notes"] == f"file:{source}"
+
+
+def test_parse_file_cache_uses_given_source_and_saves_on_request(tmp_path):
+    from src.ast_parser.parse_cache import ParseCache, save_shared_caches
+
+    source = tmp_path / "models.py"
+    source.write_text("class OnDisk:\n    pass\n")
+    cache_path = str(tmp_path / "cache.pkl")
+
+    parser = ASTParser(cache_path=cache_path)
+    nodes, _ = parser.parse_file(str(source), build_index=True, source=b"class Given:\n    pass\n")
+    assert [node.name for node in nodes.values() if node.node_type == "Class"] == ["Given"]
+
+    save_shared_caches()
+    assert str(source) in ParseCache(cache_path).entries
+
+
+def test_parse_file_cache_is_shared_across_parsers(tmp_path):
+    from src.ast_parser import parser as parser_module
+
+    source = tmp_path / "models.py"
+    source.write_text("class Base:\n    def save(self):\n        return True\n")
+    cache_path = str(tmp_path / "cache.pkl")
+
+    first_nodes, _ = ASTParser(cache_path=cache_path).parse_file(str(source), build_index=True)
+    for node in first_nodes.values():
+        node.properties["embedding"] = [0.0]
+
+    parser = ASTParser(cache_path=cache_path)
+    with record_parsed_files(parser_module) as parsed:
+        nodes, _ = parser.parse_file(str(source), build_index=True)
+
+    assert parsed == []
+    assert set(nodes) == set(first_nodes)
+    assert not any("embedding" in node.properties for node in nodes.values())
+    assert set(parser.module_definitions["models"]) == {"Base"}
+
+
+def test_iter_parse_directory_streams_per_file_batches(tmp_path, monkeypatch):
+    _write_sample_package(tmp_path)
+    monkeypatch.setenv("PARALLEL_INDEXING_ENABLED", "false")
+
+    parser = ASTParser()
+    batches = []
+    for nodes, relations in parser.iter_parse_directory(str(tmp_path)):
+        # Snapshot what a writer storing each batch on arrival would see
+        batches.append(({node_id: dict(node.properties) for node_id, node in nodes.items()}, list(relations)))
+
+    # One batch per file plus the File nodes and cross-file relations from import resolution
+    assert len(batches) == 4
+    final_nodes, final_relations = batches[-1]
+    assert sorted(properties["module_name"] for properties in final_nodes.values()) == ["models", "service", "tools"]
+    assert any(r.relation_type == "IMPORTS_DEFINITION" for r in final_relations)
+    assert all(node_id.startswith("file:") for node_id in final_nodes)
+
+    # Only the File nodes and resolved relations stay on the parser
+    assert set(parser.nodes) == set(final_nodes)
+    assert parser.relations == final_relations
+
+    nodes, relations = ASTParser().parse_directory(str(tmp_path))
+    assert set(nodes) == {node_id for batch_nodes, _ in batches for node_id in batch_nodes}
+    assert relation_keys(relations) == relation_keys([r for _, batch in batches for r in batch])
+
+
+def test_code_node_and_relation_use_slots_and_pickle():
+    import pickle
+
+    node = CodeNode("Class:a.py:A:1", "Class", "A", "a.py", 1, 3, {"k": "v"})
+    relation = CodeRelation("file:a.py", "Class:a.py:A:1", "CONTAINS")
+
+    assert not hasattr(node, "__dict__")
+    assert not hasattr(relation, "__dict__")
+    assert node.code_snippet == ""
+
+    node.code_snippet = "class A: ..."
+    restored_node = pickle.loads(pickle.dumps(node))
+    restored_relation = pickle.loads(pickle.dumps(relation))
+    assert (restored_node.node_id, restored_node.properties, restored_node.code_snippet) == (
+        node.node_id, node.properties, node.code_snippet
+    )
+    assert (restored_relation.source_id, restored_relation.relation_type, restored_relation.properties) == (
+        "file:a.py", "CONTAINS", {}
+    )
+
+
+def test_empty_properties_are_allocated_lazily():
+    import pickle
+    from src.ast_parser.parser import _properties_or_none
+
+    node = CodeNode("Class:a.py:A:1", "Class", "A", "a.py", 1)
+    relation = pickle.loads(pickle.dumps(CodeRelation("file:a.py", "Class:a.py:A:1", "CONTAINS")))
+
+    assert _properties_or_none(node) is None
+    assert _properties_or_none(relation) is None
+
+    node.properties["docstring"] = "doc"
+    relation.properties["symbol"] = "A"
+    assert node.properties == {"docstring": "doc"}
+    assert pickle.loads(pickle.dumps(relation)).properties == {"symbol": "A"}
+
+
+def test_pending_imports_assignment_groups_by_source():
+    parser = ASTParser()
+    parser.pending_imports = [
+        {"type": "IMPORTS_MODULE", "source_id": "file:a.py", "imported_module": "os"},
+        {"type": "CALLS", "source_id": "Function:a.py:f:1", "imported_module": "os", "imported_name": "getcwd"},
+        {"type": "IMPORTS_MODULE", "source_id": "file:a.py", "imported_module": "sys"},
+    ]
+
+    assert list(parser.pending_by_source) == ["file:a.py", "Function:a.py:f:1"]
+    assert [info["imported_module"] for info in parser.pending_imports] == ["os", "sys", "os"]
+
+
+def test_parse_cache_reuses_results_when_only_mtime_changes(tmp_path, monkeypatch):
+    from src.ast_parser import parser as parser_module
+
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    _write_sample_package(src_dir)
+    cache_path = str(tmp_path / "cache.pkl")
+    monkeypatch.setenv("PARALLEL_INDEXING_ENABLED", "false")
+    ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+
+    models = src_dir / "models.py"
+    stat = os.stat(models)
+    os.utime(models, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    with record_parsed_files(parser_module) as parsed:
+        nodes, _ = ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+
+    assert parsed == []
+    assert any(node.name == "Base" for node in nodes.values())
+
+
+def test_parse_directory_prunes_cache_entries_of_deleted_files(tmp_path, monkeypatch):
+    from src.ast_parser.parse_cache import get_parse_cache
+
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    _write_sample_package(src_dir)
+    cache_path = str(tmp_path / "cache.pkl")
+    monkeypatch.setenv("PARALLEL_INDEXING_ENABLED", "false")
+    ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+
+    cache = get_parse_cache(cache_path)
+    script = str(src_dir / "app.js")
+    cache.put(script, (0, 0), "other parser")
+    (src_dir / "models.py").unlink()
+    ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+
+    assert str(src_dir / "models.py") not in cache.entries
+    assert str(src_dir / "service.py") in cache.entries
+    assert script in cache.entries
+
+
+def test_parse_cache_hashes_parsed_bytes_instead_of_rereading_misses(tmp_path, monkeypatch):
+    import hashlib
+    from src.ast_parser.parse_cache import ParseCache, get_parse_cache
+
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    _write_sample_package(src_dir)
+    cache_path = str(tmp_path / "cache.pkl")
+    monkeypatch.setenv("PARALLEL_INDEXING_ENABLED", "false")
+
+    digested = []
+    digest = ParseCache.digest
+    monkeypatch.setattr(ParseCache, "digest", staticmethod(lambda path: digested.append(path) or digest(path)))
+    ASTParser(cache_path=cache_path).parse_directory(str(src_dir))
+
+    # Files without an entry are only read by the parser
+    assert digested == []
+    models = src_dir / "models.py"
+    entry = get_parse_cache(cache_path).entries[str(models)]
+    assert entry[2] == hashlib.sha256(models.read_bytes()).hexdigest()
+
+
+def test_prefetch_sources_keeps_order_and_tolerates_missing_files(tmp_path):
+    from src.ast_parser.parser import _prefetch_sources
+
+    paths = []
+    for index in range(12):
+        path = tmp_path / f"m{index}.py"
+        path.write_bytes(f"x = {index}\n".encode())
+        paths.append(str(path))
+    paths.insert(5, str(tmp_path / "missing.py"))
+
+    sources = list(_prefetch_sources(paths, depth=3))
+
+    assert sources[5] is None
+    del sources[5]
+    assert sources == [f"x = {index}\n".encode() for index in range(12)]
+
+
+def test_calls_method_resolves_to_first_method_definition(tmp_path):
+    (tmp_path / "mod.py").write_text(
+        "class Foo:\n    def bar(self):\n        pass\n    def bar(self):\n        pass\n"
+    )
+    (tmp_path / "use.py").write_text("from mod import Foo\ndef go():\n    Foo.bar()\n")
+
+    _, relations = ASTParser().parse_directory(str(tmp_path))
+
+    calls = [
+        (relation.source_id, relation.target_id, relation.properties)
+        for relation in relations
+        if relation.relation_type == "CALLS"
+    ]
+    assert calls == [(
+        f"Function:{tmp_path / 'use.py'}:go:2",
+        f"Method:{tmp_path / 'mod.py'}:bar:2",
+        {"object": "Foo", "class": "Foo"},
+    )]
+
+
 if __name__ == "__main__":
-    run_test() 
\ No newline at end of file
+    run_test()
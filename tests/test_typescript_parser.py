@@ -13,6 +13,7 @@ import tempfile
 import shutil
 import unittest
 from src.ast_parser.typescript_parser import TypeScriptParser
+from parser_helpers import parse_sequential_and_parallel, record_parsed_files, relation_keys
 
 
 class TestTypeScriptParser(unittest.TestCase):
@@ -305,6 +306,54 @@ export default App;
         func_nodes = [n for n in nodes.values() if n.node_type == "Function"]
         self.assertEqual(len(func_nodes), 3)
 
+    def test_parse_directory_skips_node_modules(self):
+        """Test that dependency directories are not parsed."""
+        self._create_test_file("app.js", "function main() { return 1; }")
+        os.makedirs(os.path.join(self.test_dir, "node_modules", "lib"))
+        self._create_test_file(os.path.join("node_modules", "lib", "index.js"), "function dep() {}")
+
+        nodes, relations = self.parser.parse_directory(self.test_dir)
+
+        self.assertEqual(sorted(n.name for n in nodes.values() if n.node_type == "File"), ["app.js"])
+
+    def test_parse_directory_cache_skips_unchanged_files(self):
+        """Test that the parse cache only re-parses files whose content changed."""
+        from unittest import mock
+        from src.ast_parser import typescript_parser as ts_module
+
+        src_dir = os.path.join(self.test_dir, "src")
+        os.makedirs(src_dir)
+        self._create_test_file(os.path.join("src", "a.js"), "function first() { return 1; }")
+        self._create_test_file(os.path.join("src", "b.ts"), "class Second {}")
+        cache_path = os.path.join(self.test_dir, "cache.pkl")
+
+        with mock.patch.dict(os.environ, {"PARALLEL_INDEXING_ENABLED": "false"}):
+            first_nodes, _ = TypeScriptParser(cache_path=cache_path).parse_directory(src_dir)
+            self.assertTrue(os.path.exists(cache_path))
+
+            with record_parsed_files(ts_module) as parsed:
+                nodes, _ = TypeScriptParser(cache_path=cache_path).parse_directory(src_dir)
+                self.assertEqual(parsed, [])
+                self.assertEqual(set(nodes), set(first_nodes))
+
+                changed = self._create_test_file(os.path.join("src", "a.js"), "function renamed() { return 2; }")
+                nodes, _ = TypeScriptParser(cache_path=cache_path).parse_directory(src_dir)
+                self.assertEqual(parsed, [changed])
+                self.assertIn("renamed", [n.name for n in nodes.values()])
+
+    def test_parse_directory_parallel_matches_sequential(self):
+        """Test that pooled parsing produces the same graph as sequential parsing."""
+        self._create_test_file("base.js", "export class Base { run() { return 1; } }")
+        self._create_test_file("user.ts", "import { Base } from 'base';\nclass User extends Base {}\nconst LIMIT = 3;")
+        self._create_test_file("util.jsx", "const helper = () => 1;")
+
+        (seq_nodes, seq_relations), (par_nodes, par_relations) = parse_sequential_and_parallel(
+            TypeScriptParser, self.test_dir
+        )
+
+        self.assertEqual(set(seq_nodes), set(par_nodes))
+        self.assertEqual(relation_keys(seq_relations), relation_keys(par_relations))
+
     def test_error_handling_invalid_syntax(self):
         """Test error handling with invalid syntax."""
         content = "function incomplete( {"
@@ -388,6 +437,84 @@ function example(x) {
         self.assertIn("function example", func_node.code_snippet)
         self.assertIn("return x * 2", func_node.code_snippet)
 
+    def test_redeclared_var_keeps_each_declaration(self):
+        """Test that declarations are deduplicated by position, not by name."""
+        content = "var count = 1;\nvar count = 2;\nlet a = 1, b = 2;\n"
+        file_path = self._create_test_file("test.js", content)
+        nodes, relations = self.parser.parse_file(file_path)
+
+        var_nodes = sorted((n.name, n.line_no) for n in nodes.values() if n.node_type == "Variable")
+        self.assertEqual(var_nodes, [("a", 3), ("count", 1), ("count", 2)])
+
+    def _reparse_after_appending_function(self, parser, **parse_kwargs):
+        """Parse a file, append a function to it and re-parse it with the edit.
+        
+        Returns:
+            Tuple of (nodes of the re-parse, arguments of each tree-sitter parse call)
+        """
+        from unittest import mock
+
+        old_content = "function first() {}\n"
+        new_content = old_content + "function second() {}\n"
+        edit = {
+            "start_byte": len(old_content),
+            "old_end_byte": len(old_content),
+            "new_end_byte": len(new_content),
+            "start_point": (1, 0),
+            "old_end_point": (1, 0),
+            "new_end_point": (2, 0),
+        }
+        parse_calls = []
+        get_parser = TypeScriptParser._get_parser_for_file
+
+        class RecordingParser:
+            def __init__(self, ts_parser):
+                self.ts_parser = ts_parser
+
+            def parse(self, *args):
+                parse_calls.append(args)
+                return self.ts_parser.parse(*args)
+
+        with mock.patch.object(
+            TypeScriptParser, "_get_parser_for_file", lambda self, path: RecordingParser(get_parser(self, path))
+        ):
+            file_path = self._create_test_file("test.js", old_content)
+            parser.parse_file(file_path, **parse_kwargs)
+            self._create_test_file("test.js", new_content)
+            nodes, relations = parser.parse_file(file_path, edits=[edit], **parse_kwargs)
+
+        self.assertFalse(parser.apply_edit(os.path.join(self.test_dir, "unknown.js"), edit))
+        return nodes, parse_calls
+
+    def test_incremental_reparse_after_edit(self):
+        """Test that an edited file is re-parsed from its previous tree."""
+        nodes, parse_calls = self._reparse_after_appending_function(self.parser)
+
+        func_names = sorted(n.name for n in nodes.values() if n.node_type == "Function")
+        self.assertEqual(func_names, ["first", "second"])
+        self.assertEqual([len(args) for args in parse_calls], [1, 2])
+
+    def test_incremental_reparse_after_edit_with_cache(self):
+        """Test that an edited file bypasses the parse cache and is re-parsed from its previous tree."""
+        parser = TypeScriptParser(cache_path=os.path.join(self.test_dir, "cache.pkl"))
+        nodes, parse_calls = self._reparse_after_appending_function(parser, build_index=True)
+
+        func_names = sorted(n.name for n in nodes.values() if n.node_type == "Function")
+        self.assertIn("second", func_names)
+        self.assertEqual([len(args) for args in parse_calls], [1, 2])
+        self.assertFalse(parser._edited_trees)
+
+    def test_non_ascii_source_text(self):
+        """Test that names and snippets after non-ASCII text are sliced correctly."""
+        content = 'const greeting = "héllo wörld 你好";\n\nfunction après(x) {\n    return x;\n}\n'
+        file_path = self._create_test_file("test.js", content)
+        nodes, relations = self.parser.parse_file(file_path)
+
+        func_nodes = [n for n in nodes.values() if n.node_type == "Function"]
+        self.assertEqual([n.name for n in func_nodes], ["après"])
+        self.assertTrue(func_nodes[0].code_snippet.startswith("function après(x)"))
+        self.assertEqual(func_nodes[0].properties["parameters"], ["x"])
+
 
 if __name__ == '__main__':
     unittest.main()